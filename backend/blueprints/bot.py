@@ -99,17 +99,10 @@ def update_bot_config():
         
         # Update config in YAML store
         try:
-            current_config = bot_bp.store.get_config()
-            telegram_config = current_config.get('telegram', {})
-            
             # Update fields that go in config (not secrets)
             if notification_channel_id:
-                telegram_config['notificationChannelId'] = notification_channel_id
-            telegram_config['whitelistMode'] = whitelist_mode
-            
-            # Always update the full config to ensure consistency
-            current_config['telegram'] = telegram_config
-            bot_bp.store.update_config(current_config)
+                bot_bp.store.patch_config(['telegram', 'notificationChannelId'], notification_channel_id)
+            bot_bp.store.patch_config(['telegram', 'whitelistMode'], whitelist_mode)
             
         except Exception as e:
             # Don't fail the whole request if config update fails
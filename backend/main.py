@@ -136,6 +136,7 @@ def create_app(config=None):
         run_all_migrations(appdata_session_factory, secret_store, data_dir)
     
     # Store in app context
+    app.store = store
     app.secret_store = secret_store
     app.secrets_engine = secrets_engine
     app.appdata_engine = appdata_engine
@@ -154,9 +155,11 @@ def create_app(config=None):
     sensitive_data_service = SensitiveDataService(secret_store)
     app.sensitive_data_service = sensitive_data_service
     
-    # Initialize offline task service and poller
+    # Initialize offline task service and poller (no background poller under TESTING)
     offline_task_service = OfflineTaskService(secrets_session_factory, store, None, cloud115_service)
-    task_poller = create_task_poller(offline_task_service)
+    task_poller = None
+    if not app.config.get('TESTING'):
+        task_poller = create_task_poller(offline_task_service)
     
     app.cloud115_service = cloud115_service
     app.cloud123_service = cloud123_service
@@ -166,7 +169,7 @@ def create_app(config=None):
     logger.info('服务初始化成功')
     
     # Start task poller
-    if not app.config.get('TESTING'):
+    if task_poller:
         task_poller.start()
     
     # Blueprints
@@ -40,23 +40,22 @@ class ConfigEntry(AppDataBase):
                 return 0
         return self.value
     
+    @staticmethod
+    def encode_value(val):
+        """返回 val 对应的 (value, value_type) 存储形式"""
+        if val is None:
+            return None, 'string'
+        if isinstance(val, bool):
+            return str(val).lower(), 'bool'
+        if isinstance(val, int):
+            return str(val), 'int'
+        if isinstance(val, (dict, list)):
+            return json.dumps(val, ensure_ascii=False), 'json'
+        return str(val), 'string'
+    
     def set_value(self, val):
         """根据值类型设置 value 和 value_type"""
-        if val is None:
-            self.value = None
-            self.value_type = 'string'
-        elif isinstance(val, bool):
-            self.value = str(val).lower()
-            self.value_type = 'bool'
-        elif isinstance(val, int):
-            self.value = str(val)
-            self.value_type = 'int'
-        elif isinstance(val, (dict, list)):
-            self.value = json.dumps(val, ensure_ascii=False)
-            self.value_type = 'json'
-        else:
-            self.value = str(val)
-            self.value_type = 'string'
+        self.value, self.value_type = self.encode_value(val)
     
     def __repr__(self):
         return f'<ConfigEntry(key={self.key}, category={self.category})>'
@@ -10,6 +10,15 @@ from sqlalchemy.orm import Session
 logger = logging.getLogger(__name__)
 
 
+def _copy_config(value):
+    """复制配置树：只复制 dict/list 容器，叶子值都是不可变的，比 deepcopy 快得多"""
+    if isinstance(value, dict):
+        return {k: _copy_config(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_config(v) for v in value]
+    return value
+
+
 class DbConfigStore:
     """
     数据库配置存储服务
@@ -147,9 +156,9 @@ class DbConfigStore:
         获取完整配置
         从数据库读取并合并默认值
         """
-        # 使用缓存
+        # 使用缓存；调用方会修改嵌套字段，所以返回整棵树的副本而不是浅拷贝
         if self._cache is not None and not self._cache_dirty:
-            return self._cache.copy()
+            return _copy_config(self._cache)
         
         with self._lock:
             session = self._get_session()
@@ -169,7 +178,7 @@ class DbConfigStore:
                 self._cache = config
                 self._cache_dirty = False
                 
-                return config.copy()
+                return _copy_config(config)
             except Exception as e:
                 logger.error(f'Failed to get config: {e}')
                 return self._get_default_config()
@@ -181,34 +190,37 @@ class DbConfigStore:
         更新配置
         将嵌套配置扁平化存储到数据库
         """
+        from models.config import ConfigEntry
+        
+        # 扁平化配置，跳过 twoFactorSecret，它存储在其他地方
+        flat_config = self._flatten_dict(config)
+        flat_config.pop('twoFactorSecret', None)
+        
         with self._lock:
             session = self._get_session()
             try:
-                from models.config import ConfigEntry
-                
-                # 扁平化配置
-                flat_config = self._flatten_dict(config)
+                # 一次查询取出已有条目，只写入存储值有变化的叶子节点
+                existing = {
+                    entry.key: entry
+                    for entry in session.query(ConfigEntry).filter(ConfigEntry.key.in_(flat_config))
+                }
                 
+                changed = 0
                 for key, value in flat_config.items():
-                    # 跳过 twoFactorSecret，它存储在其他地方
-                    if key == 'twoFactorSecret':
-                        continue
-                    
-                    # 确定 category
-                    category = key.split('.')[0] if '.' in key else 'general'
-                    
-                    # 查找或创建条目
-                    entry = session.query(ConfigEntry).filter(ConfigEntry.key == key).first()
-                    if entry:
-                        entry.set_value(value)
-                    else:
+                    entry = existing.get(key)
+                    if entry is None:
+                        # 确定 category
+                        category = key.split('.')[0] if '.' in key else 'general'
                         entry = ConfigEntry(key=key, category=category)
-                        entry.set_value(value)
                         session.add(entry)
+                    elif (entry.value, entry.value_type) == ConfigEntry.encode_value(value):
+                        continue
+                    entry.set_value(value)
+                    changed += 1
                 
                 session.commit()
                 self._cache_dirty = True
-                logger.debug(f'Config updated: {len(flat_config)} entries')
+                logger.debug(f'Config updated: {changed}/{len(flat_config)} entries changed')
             except Exception as e:
                 session.rollback()
                 logger.error(f'Failed to update config: {e}')
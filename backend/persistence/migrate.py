@@ -10,6 +10,11 @@ import yaml
 import logging
 from typing import Dict, Any
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML 未带 libyaml 编译时回退到纯 Python 解析器
+    from yaml import SafeLoader
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -24,7 +29,7 @@ def migrate_config_yaml_to_db(session_factory, yaml_path: str = '/data/config.ym
     
     try:
         with open(yaml_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f) or {}
+            config = yaml.load(f, Loader=SafeLoader) or {}
         
         if not config:
             logger.info("配置文件为空，跳过迁移")
@@ -213,9 +213,10 @@ class DataStore:
         else:
             config = self._get_default_config()
         
-        # Add 2FA secret to config if enabled
-        if self.is_two_factor_enabled():
-            config['twoFactorSecret'] = self.get_two_factor_secret()
+        # Add 2FA secret to config if enabled (one lookup serves both the check and the value)
+        two_factor_secret = self.get_two_factor_secret()
+        if two_factor_secret:
+            config['twoFactorSecret'] = two_factor_secret
         
         return config
     
@@ -234,6 +235,15 @@ class DataStore:
         else:
             logger.warning('DbConfigStore not available, config not saved')
     
+    def patch_config(self, path, value: Any):
+        """Update a single config field without rewriting the whole config."""
+        key = '.'.join(path) if isinstance(path, (list, tuple)) else path
+        if self._db_config_store:
+            category = key.split('.')[0] if '.' in key else 'general'
+            self._db_config_store.set_value(key, value, category=category)
+        else:
+            logger.warning('DbConfigStore not available, config not saved')
+    
     def invalidate_cache(self):
         """Invalidate config cache."""
         if self._db_config_store:
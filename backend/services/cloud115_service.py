@@ -7,6 +7,25 @@ from utils.logger import TaskLogger
 
 logger = logging.getLogger(__name__)
 
+# 115 凭证的密钥名，按优先级排列（open_app 优先，其次各类 Cookie）
+CREDENTIAL_KEYS = ('cloud115_openapp_cookies', 'cloud115_qr_cookies', 'cloud115_manual_cookies', 'cloud115_cookies')
+
+# 115 登录失效的错误码 (99: 请重新登录, 990001: 登录超时) 和报错关键字，命中时丢弃缓存的客户端
+AUTH_ERRNOS = frozenset({99, 990001})
+AUTH_ERROR_MARKERS = ('重新登录', '登录超时', '未登录', 'not logged in', 'unauthorized')
+
+
+def _is_auth_error(error: Exception) -> bool:
+    """Whether an exception from p115client means the login has expired."""
+    if getattr(error, 'errno', None) in AUTH_ERRNOS:
+        return True
+    # P115OSError 的 args 里通常带着接口返回的 dict
+    for arg in getattr(error, 'args', ()):
+        if isinstance(arg, dict) and arg.get('errno') in AUTH_ERRNOS:
+            return True
+    message = str(error).lower()
+    return any(marker in message for marker in AUTH_ERROR_MARKERS)
+
 
 class Cloud115Service:
     """Service for interacting with 115 cloud via p115client."""
@@ -19,7 +38,8 @@ class Cloud115Service:
             secret_store: SecretStore instance for retrieving cookies
         """
         self.secret_store = secret_store
-        self._client = None
+        # (credentials, client) 成对保存，单次赋值替换，其他线程不会读到凭证与客户端不匹配的组合
+        self._cached_client = None
         
         try:
             import p115client
@@ -80,19 +100,37 @@ class Cloud115Service:
             self._last_request_time = time.time()
 
     def _get_authenticated_client(self):
-        """Get or create an authenticated p115client instance with fallback between credentials."""
+        """Get the authenticated p115client, rebuilding it only when the stored credentials change."""
         # Enforce rate limit before getting client/making requests
         self._wait_for_rate_limit()
         
         if not self.p115client:
             raise ImportError('未安装 p115client')
         
+        credentials = tuple(self.secret_store.get_secret(key) for key in CREDENTIAL_KEYS)
+        cached = self._cached_client
+        if cached is not None and cached[0] == credentials:
+            return cached[1]
+        
+        client = self._create_authenticated_client(credentials)
+        self._cached_client = (credentials, client)
+        return client
+    
+    def _forget_client_on_auth_error(self, error: Exception):
+        """Drop the cached client when a call failed because the 115 login expired."""
+        if self._cached_client is not None and _is_auth_error(error):
+            self._cached_client = None
+            logger.warning(f'115 登录状态失效，下次请求将重新创建客户端: {error}')
+    
+    def _create_authenticated_client(self, credentials: tuple):
+        """Create an authenticated p115client instance with fallback between credentials."""
+        secrets = dict(zip(CREDENTIAL_KEYS, credentials))
         errors = []
         
         # 调试：列出所有可用的凭证
         available_keys = []
-        for key in ['cloud115_openapp_cookies', 'cloud115_qr_cookies', 'cloud115_manual_cookies', 'cloud115_cookies']:
-            secret_val = self.secret_store.get_secret(key)
+        for key in CREDENTIAL_KEYS:
+            secret_val = secrets[key]
             if secret_val:
                 available_keys.append(key)
                 # 显示部分内容用于调试
@@ -105,7 +143,7 @@ class Cloud115Service:
             raise ValueError('未找到任何 115 登录凭证，请先登录')
         
         # 首先尝试 open_app 模式 (P115OpenClient with access_token)
-        open_app_json = self.secret_store.get_secret('cloud115_openapp_cookies')
+        open_app_json = secrets['cloud115_openapp_cookies']
         if open_app_json:
             try:
                 token_data = json.loads(open_app_json)
@@ -139,7 +177,7 @@ class Cloud115Service:
         ]
         
         for secret_key, source_name in credential_sources:
-            cookies_json = self.secret_store.get_secret(secret_key)
+            cookies_json = secrets[secret_key]
             if cookies_json:
                 try:
                     # 尝试解析 JSON
@@ -249,6 +287,7 @@ class Cloud115Service:
                 'error': str(e)
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             task_log.failure(str(e))
             return {
                 'success': False,
@@ -370,6 +409,7 @@ class Cloud115Service:
                 'error': str(e)
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'列出目录 {cid} 失败: {str(e)}')
             task_log.failure(str(e))
             return {
@@ -416,6 +456,7 @@ class Cloud115Service:
                 'error': str(e)
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'重命名文件 {file_id} 失败: {str(e)}')
             return {
                 'success': False,
@@ -461,6 +502,7 @@ class Cloud115Service:
                 'error': str(e)
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'移动文件 {file_id} 失败: {str(e)}')
             return {
                 'success': False,
@@ -504,6 +546,7 @@ class Cloud115Service:
                 'error': str(e)
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'删除文件 {file_id} 失败: {str(e)}')
             return {
                 'success': False,
@@ -548,6 +591,7 @@ class Cloud115Service:
                 'error': str(e)
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'获取文件 {file_id} 的下载链接失败: {str(e)}')
             return {
                 'success': False,
@@ -766,6 +810,7 @@ class Cloud115Service:
                 'error': str(e)
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'创建离线任务失败: {str(e)}')
             return {
                 'success': False,
@@ -861,6 +906,7 @@ class Cloud115Service:
                 'error': str(e)
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'获取离线任务状态失败: {str(e)}')
             return {
                 'success': False,
@@ -1092,6 +1138,7 @@ class Cloud115Service:
                 'data': result if isinstance(result, dict) else {'quota': result}
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'获取离线配额失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1126,6 +1173,7 @@ class Cloud115Service:
                 'data': tasks
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'获取离线任务列表失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1146,6 +1194,7 @@ class Cloud115Service:
                 'data': result if isinstance(result, dict) else {'result': result}
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'添加离线任务失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1166,6 +1215,7 @@ class Cloud115Service:
                 'data': result if isinstance(result, dict) else {'deleted': task_ids}
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'删除离线任务失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1191,6 +1241,7 @@ class Cloud115Service:
                 'data': result if isinstance(result, dict) else {'cleared': True}
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'清空离线任务失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1213,6 +1264,7 @@ class Cloud115Service:
                 'data': result if isinstance(result, dict) else {'url': result}
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'获取视频播放地址失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1234,6 +1286,7 @@ class Cloud115Service:
                 'data': subtitles
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'获取视频字幕失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1268,6 +1321,7 @@ class Cloud115Service:
                 'data': files
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'搜索文件失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1288,6 +1342,7 @@ class Cloud115Service:
                 'data': result if isinstance(result, dict) else {'copied': file_ids}
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'复制文件失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1318,6 +1373,7 @@ class Cloud115Service:
                 'data': files
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'获取回收站失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1338,6 +1394,7 @@ class Cloud115Service:
                 'data': result if isinstance(result, dict) else {'restored': file_ids}
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'恢复回收站文件失败: {str(e)}')
             return {'success': False, 'error': str(e)}
     
@@ -1358,5 +1415,6 @@ class Cloud115Service:
                 'data': result if isinstance(result, dict) else {'cleared': True}
             }
         except Exception as e:
+            self._forget_client_on_auth_error(e)
             logger.error(f'清空回收站失败: {str(e)}')
             return {'success': False, 'error': str(e)}
\ No newline at end of file
@@ -1028,7 +1028,9 @@ class Cloud123Service:
             Dict with task status, progress, and speed
         """
         try:
-            client = self._get_authenticated_client()
+            client = self._get_p123_client()
+            if not client:
+                raise ValueError('未安装 p123client 或未找到 123 登录凭证')
             
             # Try various possible method names
             if hasattr(client, 'list_offline_tasks'):
@@ -1063,7 +1065,9 @@ class Cloud123Service:
                     'error': f'Task {task_id} not found'
                 }
             
-            # Map status to our enum
+            # Map status to our enum: numeric codes are 123's (1 downloading, 2 done,
+            # -1 failed), the names come from torrent-style task lists; anything
+            # unknown, including 0 (queued), is reported as pending
             status_map = {
                 '1': 'downloading',
                 '2': 'completed',
@@ -8,6 +8,11 @@ import logging
 from typing import Dict, Any, Optional, List
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML 未带 libyaml 编译时回退到纯 Python 解析器
+    from yaml import SafeLoader
+
 logger = logging.getLogger(__name__)
 
 # 配置文件目录
@@ -23,7 +28,7 @@ def load_yaml_file(filepath: Path) -> Dict[str, Any]:
     try:
         if filepath.exists():
             with open(filepath, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f) or {}
+                return yaml.load(f, Loader=SafeLoader) or {}
         else:
             logger.warning(f"Config file not found: {filepath}")
             return {}
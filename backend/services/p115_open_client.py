@@ -18,6 +18,8 @@ import secrets
 import logging
 import threading
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, Any, Tuple, Union, Callable
 from datetime import datetime
 from hashlib import sha1
@@ -27,6 +29,34 @@ logger = logging.getLogger(__name__)
 # 线程锁
 _token_lock = threading.Lock()
 
+# 所有客户端共用的连接池；Cookie 和请求头仍留在各自的 Session 上，
+# 只复用底层 keep-alive 连接，二维码生成 -> 轮询 -> 登录不再每次重新握手
+# 注意：Session.close() 会调用 adapter.close() 清空这个共享连接池，
+# 所以客户端的 session 绝不能 close (也不要用 with 语句包裹)，否则所有客户端一起断开
+# 5xx 只对 GET 重试：POST 包括重命名/移动/新建目录，重发可能重复执行
+# 读超时不重试 (read=0)：否则 timeout=10 的轮询/列目录最坏要等 40 秒以上才报错；
+# 连接失败时请求还没发出，重试一次是安全的
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(
+        total=3,
+        connect=1,
+        read=0,
+        backoff_factor=0.2,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False
+    )
+)
+
+
+def _to_data_url(resp: requests.Response) -> str:
+    """把二维码图片响应转成 data URL (ASCII 解码，base64 结果不会含非 ASCII 字符)"""
+    content_type = resp.headers.get("content-type", "image/png")
+    mime = content_type.split(";")[0] if content_type else "image/png"
+    return f"data:{mime};base64," + base64.b64encode(resp.content).decode("ascii")
+
 
 class P115OpenClient:
     """
@@ -84,6 +114,8 @@ class P115OpenClient:
             "Accept-Encoding": "gzip, deflate",
             "Content-Type": "application/x-www-form-urlencoded"
         })
+        self.session.mount("https://", _HTTP_ADAPTER)
+        self.session.mount("http://", _HTTP_ADAPTER)
     
     # ========== PKCE 认证 ==========
     
@@ -137,10 +169,7 @@ class P115OpenClient:
             try:
                 img_resp = self.session.get(data["qrcode"], timeout=10)
                 if img_resp.status_code == 200:
-                    raw_b64 = base64.b64encode(img_resp.content).decode("utf-8")
-                    content_type = img_resp.headers.get("content-type", "image/png")
-                    mime = content_type.split(";")[0] if content_type else "image/png"
-                    qrcode_b64 = f"data:{mime};base64,{raw_b64}"
+                    qrcode_b64 = _to_data_url(img_resp)
             except Exception as e:
                 logger.warning(f"[115 Open] 下载二维码图片失败: {e}")
             
@@ -636,6 +665,8 @@ class P115CookieClient:
             "Accept-Encoding": "gzip, deflate",
             "Referer": "https://115.com/"
         })
+        self.session.mount("https://", _HTTP_ADAPTER)
+        self.session.mount("http://", _HTTP_ADAPTER)
     
     def _apply_cookies(self, cookies: str):
         """应用 Cookie 到会话"""
@@ -684,10 +715,7 @@ class P115CookieClient:
                 img_url = f"https://qrcodeapi.115.com/api/1.0/{self._target_app}/1.0/qrcode?uid={uid}"
                 img_resp = self.session.get(img_url, timeout=10)
                 if img_resp.status_code == 200:
-                    raw_b64 = base64.b64encode(img_resp.content).decode("utf-8")
-                    content_type = img_resp.headers.get("content-type", "image/png")
-                    mime = content_type.split(";")[0] if content_type else "image/png"
-                    qrcode_b64 = f"data:{mime};base64,{raw_b64}"
+                    qrcode_b64 = _to_data_url(img_resp)
             except Exception as e:
                 logger.warning(f"[115 Cookie] 下载二维码图片失败: {e}")
             
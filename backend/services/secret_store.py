@@ -1,5 +1,8 @@
 import os
+import base64
+import hashlib
 import logging
+from functools import lru_cache
 from cryptography.fernet import Fernet
 from sqlalchemy.orm import Session
 from models.secret import Secret
@@ -30,6 +33,19 @@ UNENCRYPTED_KEYS = {
 }
 
 
+@lru_cache(maxsize=8)
+def _cipher_for_key(encryption_key: str) -> Fernet:
+    """Build the Fernet cipher for a key string, once per distinct key."""
+    key_bytes = encryption_key.encode()
+    # Try to verify it's valid base64
+    try:
+        return Fernet(key_bytes)
+    except Exception:
+        # Hash the provided key to create a valid Fernet key
+        hashed = hashlib.sha256(key_bytes).digest()
+        return Fernet(base64.urlsafe_b64encode(hashed))
+
+
 class SecretStore:
     """Service for storing and retrieving encrypted secrets."""
     
@@ -72,20 +88,7 @@ class SecretStore:
                 except Exception as e:
                     logger.warning(f'Failed to save encryption key to file: {e}')
         
-        # If it's a string, encode it
-        if isinstance(encryption_key, str):
-            # Try to verify it's valid base64
-            try:
-                encryption_key = encryption_key.encode()
-                Fernet(encryption_key)
-            except Exception:
-                # Hash the provided key to create a valid Fernet key
-                import base64
-                import hashlib
-                hashed = hashlib.sha256(encryption_key).digest()
-                encryption_key = base64.urlsafe_b64encode(hashed)
-        
-        return Fernet(encryption_key)
+        return _cipher_for_key(encryption_key)
     
     def _should_encrypt(self, key: str) -> bool:
         """Check if a key should be encrypted."""
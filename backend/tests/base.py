@@ -0,0 +1,150 @@
+import atexit
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+
+# Give each test process its own data dir (one per xdist worker when run with -n),
+# set before the app modules are imported so log files land there as well.
+# Prefer tmpfs so the SQLite files the older modules create skip the disk.
+_WORKER_ID = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+TEST_TMP_ROOT = '/dev/shm' if os.path.isdir('/dev/shm') else None
+TEST_DATA_DIR = tempfile.mkdtemp(prefix=f'boot-tests-{_WORKER_ID}-', dir=TEST_TMP_ROOT)
+os.environ['DATA_DIR'] = TEST_DATA_DIR
+atexit.register(shutil.rmtree, TEST_DATA_DIR, True)
+
+from main import create_app
+from blueprints.auth import auth_bp
+from models.database import SecretsBase, AppDataBase
+
+
+TEST_APP_CONFIG = {
+    'TESTING': True,
+    'JWT_SECRET_KEY': 'test-secret',
+    'SECRET_KEY': 'test-secret'
+}
+
+# Single-iteration PBKDF2 keeps test logins cheap; check_password_hash
+# reads the method from the hash, so the server side stays fast as well.
+FAST_HASH_METHOD = 'pbkdf2:sha256:1'
+
+# In-memory SQLite; _create_engine uses StaticPool for sqlite URLs, so every
+# session of an engine shares the one connection and sees the same tables.
+TEST_DATABASE_URL = 'sqlite:///:memory:'
+
+# Environment for building engines or a SecretStore, the shared app's included;
+# always applied with patch.dict so it never outlives the code that needs it.
+TEST_ENV = {
+    'DATABASE_URL': TEST_DATABASE_URL,
+    'APPDATA_DATABASE_URL': TEST_DATABASE_URL,
+    'SECRETS_ENCRYPTION_KEY': 'test-encryption-key-32-chars-long!!',
+}
+
+_shared_app = None
+_admin_auth_header = None
+
+
+def get_shared_app():
+    """Build the Flask app once per process and hand the same instance to every caller."""
+    global _shared_app
+    if _shared_app is None:
+        # Engines and the SecretStore cipher are built inside create_app, so the
+        # environment only has to hold while it runs
+        with patch.dict(os.environ, TEST_ENV):
+            _shared_app = create_app(TEST_APP_CONFIG)
+    return _shared_app
+
+
+def get_admin_auth_header():
+    """Mint one admin JWT for the shared app and return its Authorization header."""
+    global _admin_auth_header
+    if _admin_auth_header is None:
+        app = get_shared_app()
+        with app.app_context():
+            token = create_access_token(identity='admin', expires_delta=timedelta(hours=1))
+        _admin_auth_header = {'Authorization': f'Bearer {token}'}
+    return _admin_auth_header
+
+
+def reset_app_state(app):
+    """Empty the app's tables and in-memory auth state without rebuilding anything."""
+    for engine, base in ((app.secrets_engine, SecretsBase), (app.appdata_engine, AppDataBase)):
+        with engine.begin() as conn:
+            for table in reversed(base.metadata.sorted_tables):
+                conn.execute(table.delete())
+    app.store.invalidate_cache()
+    auth_bp.failed_attempts_by_client.clear()
+    app.revoked_jti.clear()
+    app.two_fa_verified_jti.clear()
+
+
+def fast_password_hash(password: str) -> str:
+    """Hash a password with the cheap test-only method."""
+    return generate_password_hash(password, method=FAST_HASH_METHOD)
+
+
+def api_response(data=None, code=0, message='ok'):
+    """Build a fake requests response carrying a 123 API envelope."""
+    return Mock(**{'json.return_value': {'code': code, 'message': message, 'data': data}})
+
+
+class FakeSecretStore:
+    """Dict-backed SecretStore for service tests that need no database."""
+
+    def __init__(self):
+        self._secrets = {}
+
+    def get_secret(self, key):
+        return self._secrets.get(key)
+
+    def set_secret(self, key, value):
+        self._secrets[key] = value
+        return True
+
+    def delete_secret(self, key):
+        return self._secrets.pop(key, None) is not None
+
+
+# Admin password seeded by AuthedAppTestCase; hashed once at import
+ADMIN_PASSWORD = 'testpass'
+ADMIN_PASSWORD_HASH = fast_password_hash(ADMIN_PASSWORD)
+
+
+class AppTestCase(unittest.TestCase):
+    """Base class for tests that talk to the shared Flask app."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = get_shared_app()
+        cls.client = cls.app.test_client()
+
+    def setUp(self):
+        reset_app_state(self.app)
+
+    def _ok(self, resp, status=200):
+        """Assert a successful JSON envelope and return its ``data`` field."""
+        self.assertEqual(resp.status_code, status)
+        payload = resp.get_json()
+        self.assertTrue(payload['success'])
+        self.assertIn('data', payload)
+        return payload['data']
+
+
+class AuthedAppTestCase(AppTestCase):
+    """AppTestCase with the admin password seeded and an admin auth header."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.store = cls.app.store
+        # Minted once per process; the header dict is shared, not rebuilt per test
+        cls.auth_header = get_admin_auth_header()
+
+    def setUp(self):
+        super().setUp()
+        self.store.update_admin_password(ADMIN_PASSWORD_HASH)
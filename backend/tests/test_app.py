@@ -2,46 +2,19 @@ import unittest
 import json
 import tempfile
 import os
-from werkzeug.security import generate_password_hash
 import pyotp
 
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from main import create_app
+from tests.base import TEST_DATA_DIR, ADMIN_PASSWORD_HASH, AppTestCase, fast_password_hash
 from persistence.store import DataStore
 
 
-class TestFlaskApp(unittest.TestCase):
+class TestFlaskApp(AppTestCase):
     """Test Flask application endpoints."""
     
-    def setUp(self):
-        """Set up test client and temporary data file."""
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-        
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        # Override data path BEFORE creating app
-        os.environ['DATA_PATH'] = self.temp_file.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_file.name)
-    
-    def tearDown(self):
-        """Clean up temporary file."""
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.store = cls.app.store
     
     def test_health_endpoint(self):
         """Test health check endpoint."""
@@ -77,7 +50,7 @@ class TestFlaskApp(unittest.TestCase):
     def test_login_with_wrong_credentials(self):
         """Test login with wrong credentials."""
         # First, set up password
-        self.store.update_admin_password(generate_password_hash('correctpass'))
+        self.store.update_admin_password(fast_password_hash('correctpass'))
         
         response = self.client.post('/api/auth/login',
             json={'username': 'admin', 'password': 'wrongpass'},
@@ -91,7 +64,7 @@ class TestFlaskApp(unittest.TestCase):
     def test_login_with_correct_credentials(self):
         """Test login with correct credentials."""
         # Set up password
-        self.store.update_admin_password(generate_password_hash('correctpass'))
+        self.store.update_admin_password(fast_password_hash('correctpass'))
         
         response = self.client.post('/api/auth/login',
             json={'username': 'admin', 'password': 'correctpass'},
@@ -111,7 +84,7 @@ class TestFlaskApp(unittest.TestCase):
     def test_get_config_with_auth(self):
         """Test getting config with authentication."""
         # Login first
-        self.store.update_admin_password(generate_password_hash('testpass'))
+        self.store.update_admin_password(ADMIN_PASSWORD_HASH)
         login_response = self.client.post('/api/auth/login',
             json={'username': 'admin', 'password': 'testpass'},
             content_type='application/json'
@@ -132,7 +105,7 @@ class TestFlaskApp(unittest.TestCase):
     def test_update_config_with_auth(self):
         """Test updating config with authentication."""
         # Login first
-        self.store.update_admin_password(generate_password_hash('testpass'))
+        self.store.update_admin_password(ADMIN_PASSWORD_HASH)
         login_response = self.client.post('/api/auth/login',
             json={'username': 'admin', 'password': 'testpass'},
             content_type='application/json'
@@ -159,7 +132,7 @@ class TestFlaskApp(unittest.TestCase):
     def test_verify_otp_without_2fa_setup(self):
         """Test OTP verification without 2FA setup."""
         # Login first
-        self.store.update_admin_password(generate_password_hash('testpass'))
+        self.store.update_admin_password(ADMIN_PASSWORD_HASH)
         login_response = self.client.post('/api/auth/login',
             json={'username': 'admin', 'password': 'testpass'},
             content_type='application/json'
@@ -178,7 +151,7 @@ class TestFlaskApp(unittest.TestCase):
     def test_setup_2fa(self):
         """Test 2FA setup."""
         # Login first
-        self.store.update_admin_password(generate_password_hash('testpass'))
+        self.store.update_admin_password(ADMIN_PASSWORD_HASH)
         login_response = self.client.post('/api/auth/login',
             json={'username': 'admin', 'password': 'testpass'},
             content_type='application/json'
@@ -203,7 +176,7 @@ class TestFlaskApp(unittest.TestCase):
         self.store.update_two_factor_secret(secret)
         
         # Login
-        self.store.update_admin_password(generate_password_hash('testpass'))
+        self.store.update_admin_password(ADMIN_PASSWORD_HASH)
         login_response = self.client.post('/api/auth/login',
             json={'username': 'admin', 'password': 'testpass'},
             content_type='application/json'
@@ -229,7 +202,7 @@ class TestFlaskApp(unittest.TestCase):
     def test_get_me_endpoint(self):
         """Test /api/me endpoint."""
         # Login first
-        self.store.update_admin_password(generate_password_hash('testpass'))
+        self.store.update_admin_password(ADMIN_PASSWORD_HASH)
         login_response = self.client.post('/api/auth/login',
             json={'username': 'admin', 'password': 'testpass'},
             content_type='application/json'
@@ -252,7 +225,7 @@ class TestDataStore(unittest.TestCase):
     
     def setUp(self):
         """Set up temporary data file."""
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
+        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json', dir=TEST_DATA_DIR)
         self.temp_file.close()
         self.store = DataStore(self.temp_file.name)
     
@@ -289,7 +262,7 @@ class TestDataStore(unittest.TestCase):
     
     def test_admin_password_update(self):
         """Test admin password storage."""
-        password_hash = generate_password_hash('testpassword')
+        password_hash = fast_password_hash('testpassword')
         self.store.update_admin_password(password_hash)
         
         admin = self.store.get_admin_credentials()
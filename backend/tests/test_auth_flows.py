@@ -1,65 +1,33 @@
 import unittest
-import json
-import tempfile
-import os
 
-from werkzeug.security import generate_password_hash
 import pyotp
+from werkzeug.security import generate_password_hash
 
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from main import create_app
-from persistence.store import DataStore
-
-
-class TestAuthFlows(unittest.TestCase):
-    def setUp(self):
-        self.temp_yaml = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_yaml.close()
-
-        self.temp_json = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_json.close()
+from tests.base import ADMIN_PASSWORD, ADMIN_PASSWORD_HASH, AppTestCase, fast_password_hash
 
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
 
-        os.environ['DATA_PATH'] = self.temp_json.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_yaml.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
+# Fixed secret instead of pyotp.random_base32(); the generator is built once per module
+_TEST_TOTP_SECRET = 'JBSWY3DPEHPK3PXP'
+_TOTP = pyotp.TOTP(_TEST_TOTP_SECRET)
 
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
+# Admin password hashes; 'testpass' is the base module's, only 'oldpass' is hashed here
+_PASSWORD_HASHES = {ADMIN_PASSWORD: ADMIN_PASSWORD_HASH, 'oldpass': fast_password_hash('oldpass')}
 
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_json.name, self.temp_yaml.name)
 
-    def tearDown(self):
-        if os.path.exists(self.temp_yaml.name):
-            os.unlink(self.temp_yaml.name)
-        if os.path.exists(self.temp_json.name):
-            os.unlink(self.temp_json.name)
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
+class TestAuthFlows(AppTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.store = cls.app.store
 
     def _login_and_get_token(self, password: str = 'testpass') -> str:
-        self.store.update_admin_password(generate_password_hash(password))
+        self.store.update_admin_password(_PASSWORD_HASHES[password])
         resp = self.client.post('/api/auth/login', json={'username': 'admin', 'password': password})
-        self.assertEqual(resp.status_code, 200)
-        payload = json.loads(resp.data)
-        return payload['data']['token']
+        return self._ok(resp)['token']
 
     def test_status_unauthenticated_defaults(self):
         resp = self.client.get('/api/auth/status')
-        self.assertEqual(resp.status_code, 200)
-        payload = json.loads(resp.data)
-
-        self.assertTrue(payload['success'])
-        self.assertIn('data', payload)
-        data = payload['data']
+        data = self._ok(resp)
 
         self.assertFalse(data['isAuthenticated'])
         self.assertFalse(data['isLocked'])
@@ -69,74 +37,68 @@ class TestAuthFlows(unittest.TestCase):
     def test_password_change_validates_current_password(self):
         token = self._login_and_get_token('oldpass')
 
-        resp = self.client.put(
-            '/api/auth/password',
-            json={'currentPassword': 'wrong', 'newPassword': 'newpass'},
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        self.assertEqual(resp.status_code, 401)
-
-        resp = self.client.put(
-            '/api/auth/password',
-            json={'currentPassword': 'oldpass', 'newPassword': 'newpass'},
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        self.assertEqual(resp.status_code, 200)
-        payload = json.loads(resp.data)
-        self.assertTrue(payload['success'])
-        self.assertIn('data', payload)
-        self.assertIn('isAuthenticated', payload['data'])
+        # Reuse one client context for the whole exchange
+        with self.client as c:
+            resp = c.put(
+                '/api/auth/password',
+                json={'currentPassword': 'wrong', 'newPassword': 'newpass'},
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            self.assertEqual(resp.status_code, 401)
 
-        # Old password should fail, new password should work
-        resp = self.client.post('/api/auth/login', json={'username': 'admin', 'password': 'oldpass'})
-        self.assertEqual(resp.status_code, 401)
+            resp = c.put(
+                '/api/auth/password',
+                json={'currentPassword': 'oldpass', 'newPassword': 'newpass'},
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            self.assertIn('isAuthenticated', self._ok(resp))
 
-        resp = self.client.post('/api/auth/login', json={'username': 'admin', 'password': 'newpass'})
-        self.assertEqual(resp.status_code, 200)
+            # Old password should fail, new password should work
+            resp = c.post('/api/auth/login', json={'username': 'admin', 'password': 'oldpass'})
+            self.assertEqual(resp.status_code, 401)
+
+            resp = c.post('/api/auth/login', json={'username': 'admin', 'password': 'newpass'})
+            self.assertEqual(resp.status_code, 200)
 
     def test_logout_revokes_token_and_clears_2fa_verifier(self):
-        secret = pyotp.random_base32()
-        self.store.update_two_factor_secret(secret)
+        self.store.update_two_factor_secret(_TEST_TOTP_SECRET)
 
         token = self._login_and_get_token('testpass')
 
-        # Not verified initially
-        resp = self.client.get('/api/auth/status', headers={'Authorization': f'Bearer {token}'})
-        payload = json.loads(resp.data)
-        self.assertTrue(payload['success'])
-        self.assertTrue(payload['data']['isAuthenticated'])
-        self.assertFalse(payload['data']['is2FAVerified'])
-        self.assertEqual(payload['data']['twoFactorSecret'], secret)
-
-        # Verify OTP
-        totp = pyotp.TOTP(secret)
-        code = totp.now()
-        resp = self.client.post(
-            '/api/auth/verify-otp',
-            json={'code': code},
-            headers={'Authorization': f'Bearer {token}'}
-        )
-        self.assertEqual(resp.status_code, 200)
-
-        resp = self.client.get('/api/auth/status', headers={'Authorization': f'Bearer {token}'})
-        payload = json.loads(resp.data)
-        self.assertTrue(payload['data']['is2FAVerified'])
-
-        # Logout should revoke token and clear 2FA verifier
-        resp = self.client.post('/api/auth/logout', headers={'Authorization': f'Bearer {token}'})
-        self.assertEqual(resp.status_code, 200)
-
-        # Revoked token should be rejected by protected endpoints
-        resp = self.client.get('/api/config', headers={'Authorization': f'Bearer {token}'})
-        self.assertEqual(resp.status_code, 401)
+        # Reuse one client context for the whole exchange
+        with self.client as c:
+            # Not verified initially
+            resp = c.get('/api/auth/status', headers={'Authorization': f'Bearer {token}'})
+            data = self._ok(resp)
+            self.assertTrue(data['isAuthenticated'])
+            self.assertFalse(data['is2FAVerified'])
+            self.assertEqual(data['twoFactorSecret'], _TEST_TOTP_SECRET)
+
+            # Verify OTP
+            resp = c.post(
+                '/api/auth/verify-otp',
+                json={'code': _TOTP.now()},
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            self.assertEqual(resp.status_code, 200)
+
+            resp = c.get('/api/auth/status', headers={'Authorization': f'Bearer {token}'})
+            self.assertTrue(self._ok(resp)['is2FAVerified'])
+
+            # Logout should revoke token and clear 2FA verifier
+            resp = c.post('/api/auth/logout', headers={'Authorization': f'Bearer {token}'})
+            self.assertEqual(resp.status_code, 200)
+
+            # Revoked token should be rejected by protected endpoints
+            resp = c.get('/api/config', headers={'Authorization': f'Bearer {token}'})
+            self.assertEqual(resp.status_code, 401)
 
-        # Status treats revoked token as unauthenticated
-        resp = self.client.get('/api/auth/status', headers={'Authorization': f'Bearer {token}'})
-        payload = json.loads(resp.data)
-        self.assertTrue(payload['success'])
-        self.assertFalse(payload['data']['isAuthenticated'])
+            # Status treats revoked token as unauthenticated
+            resp = c.get('/api/auth/status', headers={'Authorization': f'Bearer {token}'})
+            self.assertFalse(self._ok(resp)['isAuthenticated'])
 
     def test_lockout_after_failed_attempts(self):
+        # Uses the default KDF so the real hashing path stays covered
         self.store.update_admin_password(generate_password_hash('correctpass'))
 
         for _ in range(5):
@@ -144,10 +106,9 @@ class TestAuthFlows(unittest.TestCase):
             self.assertEqual(resp.status_code, 401)
 
         resp = self.client.get('/api/auth/status')
-        payload = json.loads(resp.data)
-        self.assertTrue(payload['success'])
-        self.assertTrue(payload['data']['isLocked'])
-        self.assertEqual(payload['data']['failedAttempts'], 5)
+        data = self._ok(resp)
+        self.assertTrue(data['isLocked'])
+        self.assertEqual(data['failedAttempts'], 5)
 
         # Even correct credentials should not work once locked
         resp = self.client.post('/api/auth/login', json={'username': 'admin', 'password': 'correctpass'})
@@ -156,7 +117,7 @@ class TestAuthFlows(unittest.TestCase):
     def test_user_summary_alias(self):
         resp = self.client.get('/api/user/summary')
         self.assertEqual(resp.status_code, 200)
-        payload = json.loads(resp.data)
+        payload = resp.get_json()
         self.assertIn('data', payload)
         self.assertIn('isAuthenticated', payload['data'])
 
@@ -1,115 +1,90 @@
 import unittest
-import json
-import tempfile
-import os
-from unittest.mock import Mock, patch, MagicMock
-from werkzeug.security import generate_password_hash
+from unittest.mock import Mock, patch
 
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import requests.exceptions
 
-from main import create_app
-from persistence.store import DataStore
-from models.database import init_db, get_session_factory
+from tests.base import AuthedAppTestCase
+from services.telegram_bot import TelegramBotService
 
 
-class TestBotBlueprint(unittest.TestCase):
+def _default_config():
+    """Config every bot test starts from; a fresh dict each call, nested sections included."""
+    return {
+        'telegram': {
+            'botToken': '',
+            'adminUserId': '',
+            'notificationChannelId': '',
+            'whitelistMode': False
+        },
+        'cloud115': {
+            'loginMethod': 'cookie',
+            'loginApp': 'web',
+            'cookies': '',
+            'userAgent': '',
+            'downloadPath': '0',
+            'downloadDirName': 'Downloads',
+            'autoDeleteMsg': True,
+            'qps': 1.0
+        },
+        'cloud123': {
+            'enabled': False,
+            'clientId': '',
+            'clientSecret': '',
+            'downloadPath': '0',
+            'downloadDirName': 'Downloads',
+            'qps': 1.0
+        },
+        'proxy': {
+            'enabled': False,
+            'type': 'http',
+            'host': '',
+            'port': '',
+            'username': '',
+            'password': ''
+        },
+        'tmdb': {
+            'apiKey': '',
+            'language': 'zh-CN',
+            'includeAdult': False
+        }
+    }
+
+
+def _mk_resp(status, body):
+    """Build a stand-in for a Telegram API response."""
+    resp = Mock(spec=['status_code', 'json', 'text'])
+    resp.status_code = status
+    resp.json.return_value = body
+    resp.text = str(body)
+    return resp
+
+
+class TestBotBlueprint(AuthedAppTestCase):
     """Test bot blueprint endpoints."""
     
-    def setUp(self):
-        """Set up test client and temporary data files."""
-        self.temp_config = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_config.close()
-        self.temp_data = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_data.close()
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        # Override paths BEFORE creating app
-        os.environ['DATA_PATH'] = self.temp_data.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_config.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        os.environ['SECRETS_ENCRYPTION_KEY'] = 'test-encryption-key-32-chars-long!!'
-        os.environ['ALLOW_UNAUTHENTICATED_CONFIG'] = 'true'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_data.name, self.temp_config.name)
-        
-        # Initialize default config
-        default_config = {
-            'telegram': {
-                'botToken': '',
-                'adminUserId': '',
-                'notificationChannelId': '',
-                'whitelistMode': False
-            },
-            'cloud115': {
-                'loginMethod': 'cookie',
-                'loginApp': 'web',
-                'cookies': '',
-                'userAgent': '',
-                'downloadPath': '0',
-                'downloadDirName': 'Downloads',
-                'autoDeleteMsg': True,
-                'qps': 1.0
-            },
-            'cloud123': {
-                'enabled': False,
-                'clientId': '',
-                'clientSecret': '',
-                'downloadPath': '0',
-                'downloadDirName': 'Downloads',
-                'qps': 1.0
-            },
-            'proxy': {
-                'enabled': False,
-                'type': 'http',
-                'host': '',
-                'port': '',
-                'username': '',
-                'password': ''
-            },
-            'tmdb': {
-                'apiKey': '',
-                'language': 'zh-CN',
-                'includeAdult': False
-            }
-        }
-        self.store.update_config(default_config)
-        
-        # Set up admin for authentication
-        self.store.update_admin_password(generate_password_hash('testpass'))
-        
-        # Get auth token
-        login_response = self.client.post('/api/auth/login',
-            json={'username': 'admin', 'password': 'testpass'},
-            content_type='application/json'
-        )
-        self.token = json.loads(login_response.data)['data']['token']
-        self.auth_header = {'Authorization': f'Bearer {self.token}'}
+    @classmethod
+    def setUpClass(cls):
+        """Stub the Telegram HTTP calls on top of the shared authed app."""
+        super().setUpClass()
+        
+        # Stub the Telegram HTTP calls once for the class; tests set return values per case
+        get_patcher = patch('services.telegram_bot.requests.get')
+        post_patcher = patch('services.telegram_bot.requests.post')
+        cls.mock_get = get_patcher.start()
+        cls.addClassCleanup(get_patcher.stop)
+        cls.mock_post = post_patcher.start()
+        cls.addClassCleanup(post_patcher.stop)
     
-    def tearDown(self):
-        """Clean up temporary files."""
-        try:
-            os.unlink(self.temp_config.name)
-            os.unlink(self.temp_data.name)
-            os.unlink(self.temp_db.name)
-        except:
-            pass
+    def setUp(self):
+        """Reset config; some tests write bot settings back to the store."""
+        super().setUp()
+        self.mock_get.reset_mock(return_value=True, side_effect=True)
+        self.mock_post.reset_mock(return_value=True, side_effect=True)
+        self.store.update_config(_default_config())
     
-    @patch('requests.get')
-    def test_validate_bot_token_success(self, mock_get):
-        """Test successful bot token validation."""
-        # Mock successful Telegram API response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
+    def test_validate_bot_token(self):
+        """Test bot token validation against mocked getMe responses."""
+        ok_body = {
             'ok': True,
             'result': {
                 'id': 123456789,
@@ -118,75 +93,39 @@ class TestBotBlueprint(unittest.TestCase):
                 'username': 'testbot'
             }
         }
-        mock_get.return_value = mock_response
-        
-        # Test validation with mocked secret store
-        from services.telegram_bot import TelegramBotService
-        
-        mock_secret_store = Mock()
-        service = TelegramBotService(mock_secret_store)
-        
-        result = service.validate_bot_token('123456:ABC-DEF')
-        
-        self.assertTrue(result['valid'])
-        self.assertIn('data', result)
-        self.assertEqual(result['data']['username'], 'testbot')
-        
-        # Verify API was called correctly
-        mock_get.assert_called_once_with(
-            'https://api.telegram.org/bot123456:ABC-DEF/getMe',
-            timeout=10
-        )
-    
-    @patch('requests.get')
-    def test_validate_bot_token_invalid(self, mock_get):
-        """Test invalid bot token validation."""
-        # Mock failed Telegram API response
-        mock_response = Mock()
-        mock_response.status_code = 401
-        mock_response.json.return_value = {
-            'ok': False,
-            'description': 'Unauthorized'
-        }
-        mock_get.return_value = mock_response
-        
-        from services.telegram_bot import TelegramBotService
-        
-        mock_secret_store = Mock()
-        service = TelegramBotService(mock_secret_store)
-        
-        result = service.validate_bot_token('invalid_token')
-        
-        self.assertFalse(result['valid'])
-        self.assertIn('error', result)
-    
-    @patch('requests.get')
-    def test_validate_bot_token_timeout(self, mock_get):
-        """Test bot token validation timeout."""
-        # Mock timeout
-        import requests.exceptions
-        mock_get.side_effect = requests.exceptions.Timeout()
-        
-        from services.telegram_bot import TelegramBotService
-        
-        mock_secret_store = Mock()
-        service = TelegramBotService(mock_secret_store)
-        
-        result = service.validate_bot_token('123456:ABC-DEF')
+        # (name, token, status, body, side_effect, expected_valid, expected_error)
+        cases = [
+            ('success', '123456:ABC-DEF', 200, ok_body, None, True, None),
+            ('invalid', 'invalid_token', 401, {'ok': False, 'description': 'Unauthorized'}, None, False, ''),
+            ('timeout', '123456:ABC-DEF', None, None, requests.exceptions.Timeout(), False, 'timed out'),
+        ]
         
-        self.assertFalse(result['valid'])
-        self.assertIn('timed out', result['error'])
+        for name, token, status, body, side_effect, expected_valid, expected_error in cases:
+            with self.subTest(name):
+                self.mock_get.reset_mock(return_value=True, side_effect=True)
+                if side_effect is not None:
+                    self.mock_get.side_effect = side_effect
+                else:
+                    self.mock_get.return_value = _mk_resp(status, body)
+                
+                service = TelegramBotService(Mock())
+                result = service.validate_bot_token(token)
+                
+                self.assertEqual(result['valid'], expected_valid)
+                if expected_valid:
+                    self.assertEqual(result['data']['username'], 'testbot')
+                    self.mock_get.assert_called_once_with(
+                        f'https://api.telegram.org/bot{token}/getMe',
+                        timeout=10
+                    )
+                else:
+                    self.assertIn(expected_error, result['error'])
     
     def test_get_bot_config_without_auth(self):
         """Test getting bot config without authentication."""
         response = self.client.get('/api/bot/config')
         
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-        self.assertIn('data', data)
-        
-        telegram_config = data['data']
+        telegram_config = self._ok(response)
         self.assertEqual(telegram_config['botToken'], '')
         self.assertEqual(telegram_config['adminUserId'], '')
         self.assertEqual(telegram_config['notificationChannelId'], '')
@@ -197,12 +136,7 @@ class TestBotBlueprint(unittest.TestCase):
         """Test getting bot config with authentication."""
         response = self.client.get('/api/bot/config', headers=self.auth_header)
         
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-        self.assertIn('data', data)
-        
-        telegram_config = data['data']
+        telegram_config = self._ok(response)
         self.assertEqual(telegram_config['botToken'], '')
         self.assertEqual(telegram_config['adminUserId'], '')
         self.assertFalse(telegram_config['hasValidConfig'])
@@ -216,20 +150,13 @@ class TestBotBlueprint(unittest.TestCase):
         
         # Should fail because bot token validation is required when provided
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
-    @patch('requests.get')
-    def test_update_bot_config_invalid_token(self, mock_get):
+    def test_update_bot_config_invalid_token(self):
         """Test updating bot config with invalid bot token."""
         # Mock failed validation
-        mock_response = Mock()
-        mock_response.status_code = 401
-        mock_response.json.return_value = {
-            'ok': False,
-            'description': 'Unauthorized'
-        }
-        mock_get.return_value = mock_response
+        self.mock_get.return_value = _mk_resp(401, {'ok': False, 'description': 'Unauthorized'})
         
         response = self.client.post('/api/bot/config',
             json={
@@ -241,7 +168,7 @@ class TestBotBlueprint(unittest.TestCase):
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
         self.assertIn('Invalid bot token', data['error'])
     
@@ -263,10 +190,7 @@ class TestBotBlueprint(unittest.TestCase):
             headers=self.auth_header
         )
         
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-        self.assertIn('data', data)
+        self._ok(response)
         
         # Verify validation was called
         mock_validate.assert_called_once_with('123456:ABC-DEF')
@@ -279,14 +203,11 @@ class TestBotBlueprint(unittest.TestCase):
     
     def test_get_bot_commands(self):
         """Test getting bot commands."""
-        response = self.client.get('/api/bot/commands')
-        
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-        self.assertIn('data', data)
+        response = self.client.get('/api/bot/commands',
+            headers=self.auth_header
+        )
         
-        commands = data['data']
+        commands = self._ok(response)
         self.assertIsInstance(commands, list)
         self.assertGreater(len(commands), 0)
         
@@ -308,7 +229,7 @@ class TestBotBlueprint(unittest.TestCase):
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
         self.assertIn('Invalid command format', data['error'])
     
@@ -335,11 +256,7 @@ class TestBotBlueprint(unittest.TestCase):
             headers=self.auth_header
         )
         
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-        self.assertIn('data', data)
-        self.assertEqual(data['data'], commands)
+        self.assertEqual(self._ok(response), commands)
         
         # Verify save was called
         mock_save.assert_called_once_with(commands)
@@ -363,109 +280,48 @@ class TestBotBlueprint(unittest.TestCase):
         )
         
         self.assertEqual(response.status_code, 500)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
         self.assertIn('Failed to save commands', data['error'])
     
-    @patch('requests.post')
-    def test_send_test_message_admin_success(self, mock_post):
-        """Test successful test message to admin."""
-        # Mock successful Telegram API response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            'ok': True,
-            'result': {
-                'message_id': 123,
-                'chat': {'id': 123456789},
-                'text': 'Test message'
-            }
-        }
-        mock_post.return_value = mock_response
-        
-        # Mock getting bot credentials
-        with patch('services.telegram_bot.TelegramBotService.get_bot_token', return_value='123456:ABC-DEF'), \
-             patch('services.telegram_bot.TelegramBotService.get_admin_user_id', return_value='123456789'):
-            
-            response = self.client.post('/api/bot/test-message',
-                json={'target_type': 'admin'},
-                headers=self.auth_header
-            )
-        
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-        self.assertIn('data', data)
-        self.assertEqual(data['data']['message_id'], 123)
-        
-        # Verify API was called correctly
-        mock_post.assert_called_once()
-        call_args = mock_post.call_args
-        self.assertIn('sendMessage', call_args[0][0])
-    
-    @patch('requests.post')
-    def test_send_test_message_no_token(self, mock_post):
-        """Test test message without bot token configured."""
-        # Mock no bot token
-        with patch('services.telegram_bot.TelegramBotService.get_bot_token', return_value=None):
-            
-            response = self.client.post('/api/bot/test-message',
-                json={'target_type': 'admin'},
-                headers=self.auth_header
-            )
-        
-        self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
-        self.assertFalse(data['success'])
-        self.assertIn('Bot token not configured', data['error'])
-    
-    @patch('requests.post')
-    def test_send_test_message_channel_success(self, mock_post):
-        """Test successful test message to channel."""
-        # Mock successful Telegram API response
-        mock_response = Mock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            'ok': True,
-            'result': {
-                'message_id': 456,
-                'chat': {'id': -100123456789},
-                'text': 'Test message'
-            }
-        }
-        mock_post.return_value = mock_response
-        
-        # Mock getting bot credentials
-        with patch('services.telegram_bot.TelegramBotService.get_bot_token', return_value='123456:ABC-DEF'):
-            
-            response = self.client.post('/api/bot/test-message',
-                json={
-                    'target_type': 'channel',
-                    'target_id': '-100123456789'
-                },
-                headers=self.auth_header
-            )
-        
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-        self.assertEqual(data['data']['message_id'], 456)
-    
-    @patch('requests.post')
-    def test_send_test_message_channel_missing_id(self, mock_post):
-        """Test test message to channel without providing ID."""
-        # Mock getting bot credentials
-        with patch('services.telegram_bot.TelegramBotService.get_bot_token', return_value='123456:ABC-DEF'):
-            
-            response = self.client.post('/api/bot/test-message',
-                json={'target_type': 'channel'},  # No target_id
-                headers=self.auth_header
-            )
+    def test_send_test_message(self):
+        """Test sending a test message to the admin or a channel."""
+        # (name, bot_token, payload, message_id, expected_status, expected_error)
+        cases = [
+            ('admin_success', '123456:ABC-DEF', {'target_type': 'admin'}, 123, 200, None),
+            ('no_token', None, {'target_type': 'admin'}, None, 400, 'Bot token not configured'),
+            ('channel_success', '123456:ABC-DEF',
+             {'target_type': 'channel', 'target_id': '-100123456789'}, 456, 200, None),
+            ('channel_missing_id', '123456:ABC-DEF', {'target_type': 'channel'}, None, 400,
+             'Channel ID is required'),
+        ]
         
-        self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
-        self.assertFalse(data['success'])
-        self.assertIn('Channel ID is required', data['error'])
+        for name, bot_token, payload, message_id, expected_status, expected_error in cases:
+            with self.subTest(name):
+                self.mock_post.reset_mock(return_value=True, side_effect=True)
+                if message_id is not None:
+                    self.mock_post.return_value = _mk_resp(200, {
+                        'ok': True,
+                        'result': {'message_id': message_id, 'text': 'Test message'}
+                    })
+                
+                with patch('services.telegram_bot.TelegramBotService.get_bot_token', return_value=bot_token), \
+                     patch('services.telegram_bot.TelegramBotService.get_admin_user_id', return_value='123456789'):
+                    response = self.client.post('/api/bot/test-message',
+                        json=payload,
+                        headers=self.auth_header
+                    )
+                
+                self.assertEqual(response.status_code, expected_status)
+                data = response.get_json()
+                if expected_error:
+                    self.assertFalse(data['success'])
+                    self.assertIn(expected_error, data['error'])
+                else:
+                    self.assertTrue(data['success'])
+                    self.assertEqual(data['data']['message_id'], message_id)
+                    self.mock_post.assert_called_once()
+                    self.assertIn('sendMessage', self.mock_post.call_args[0][0])
     
     def test_send_test_message_invalid_target_type(self):
         """Test test message with invalid target type."""
@@ -475,7 +331,7 @@ class TestBotBlueprint(unittest.TestCase):
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
         # Bot token check happens before target type validation
         self.assertTrue('Bot token not configured' in data['error'] or 'Invalid target type' in data['error'])
@@ -1,61 +1,19 @@
 import unittest
-import json
-import tempfile
 import os
 from unittest.mock import Mock, patch, MagicMock
-from werkzeug.security import generate_password_hash
+from sqlalchemy import text
 
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from main import create_app
-from persistence.store import DataStore
+from tests.base import TEST_ENV, AuthedAppTestCase
+from p115_bridge import P115Service
 from models.database import init_db, get_session_factory
+from models.secret import Secret
+from services.secret_store import SecretStore
 
 
-class TestCloud115Blueprint(unittest.TestCase):
+class TestCloud115Blueprint(AuthedAppTestCase):
     """Test 115 cloud blueprint endpoints."""
     
-    def setUp(self):
-        """Set up test client and temporary data file."""
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        # Override paths BEFORE creating app
-        os.environ['DATA_PATH'] = self.temp_file.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        os.environ['SECRETS_ENCRYPTION_KEY'] = 'test-encryption-key-32-chars-long!!'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_file.name)
-        
-        # Set up admin for authentication
-        self.store.update_admin_password(generate_password_hash('testpass'))
-        
-        # Get auth token
-        login_response = self.client.post('/api/auth/login',
-            json={'username': 'admin', 'password': 'testpass'},
-            content_type='application/json'
-        )
-        self.token = json.loads(login_response.data)['data']['token']
-        self.auth_header = {'Authorization': f'Bearer {self.token}'}
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
-    
-    @patch('p115_bridge.P115Service.start_qr_login')
+    @patch.object(P115Service, 'start_qr_login')
     def test_start_qr_login_success(self, mock_start_qr):
         """Test starting a QR code login."""
         mock_start_qr.return_value = {
@@ -70,12 +28,11 @@ class TestCloud115Blueprint(unittest.TestCase):
                 'loginApp': 'web',
                 'loginMethod': 'cookie'
             },
-            headers=self.auth_header,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertIn('sessionId', data['data'])
         self.assertIn('qrcode', data['data'])
@@ -88,8 +45,7 @@ class TestCloud115Blueprint(unittest.TestCase):
             json={
                 'loginApp': 'web',
                 'loginMethod': 'cookie'
-            },
-            content_type='application/json'
+            }
         )
         
         self.assertEqual(response.status_code, 401)
@@ -101,15 +57,14 @@ class TestCloud115Blueprint(unittest.TestCase):
                 'loginApp': 'web',
                 'loginMethod': 'invalid'
             },
-            headers=self.auth_header,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
-    @patch('p115_bridge.P115Service.poll_login_status')
+    @patch.object(P115Service, 'poll_login_status')
     def test_poll_login_status_nonexistent_session(self, mock_poll):
         """Test polling status for non-existent session."""
         mock_poll.return_value = {
@@ -122,7 +77,7 @@ class TestCloud115Blueprint(unittest.TestCase):
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
     def test_ingest_cookies_without_auth(self):
@@ -132,8 +87,7 @@ class TestCloud115Blueprint(unittest.TestCase):
                 'cookies': {
                     'UID': 'test_uid'
                 }
-            },
-            content_type='application/json'
+            }
         )
         
         self.assertEqual(response.status_code, 401)
@@ -142,27 +96,25 @@ class TestCloud115Blueprint(unittest.TestCase):
         """Test ingesting cookies with missing data."""
         response = self.client.post('/api/115/login/cookie',
             json={},
-            headers=self.auth_header,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
-    @patch('p115_bridge.P115Service.validate_cookies')
+    @patch.object(P115Service, 'validate_cookies')
     def test_ingest_cookies_invalid_format(self, mock_validate):
         """Test ingesting cookies with invalid format."""
         response = self.client.post('/api/115/login/cookie',
             json={
                 'cookies': 'not-a-dict'
             },
-            headers=self.auth_header,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
     def test_get_session_health_no_session(self):
@@ -172,7 +124,7 @@ class TestCloud115Blueprint(unittest.TestCase):
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertFalse(data['data']['hasValidSession'])
     
@@ -186,26 +138,22 @@ class TestCloud115Blueprint(unittest.TestCase):
 class TestSecretStore(unittest.TestCase):
     """Test SecretStore for secret persistence."""
     
-    def setUp(self):
-        """Set up temporary database."""
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        os.environ['SECRETS_ENCRYPTION_KEY'] = 'test-encryption-key-32-chars-long!!'
+    @classmethod
+    def setUpClass(cls):
+        """Set up an in-memory database and its schema once for the class."""
+        cls.enterClassContext(patch.dict(os.environ, TEST_ENV))
         
         # Initialize database
-        from models.database import init_db, get_session_factory
-        engine = init_db()
-        session_factory = get_session_factory(engine)
-        
-        from services.secret_store import SecretStore
-        self.secret_store = SecretStore(session_factory)
+        cls.engine = init_db()
+        session_factory = get_session_factory(cls.engine)
+        cls.secret_store = SecretStore(session_factory)
     
-    def tearDown(self):
-        """Clean up temporary files."""
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
+    def setUp(self):
+        """Clear stored secrets left by the previous test."""
+        session = self.secret_store.session_factory()
+        session.query(Secret).delete()
+        session.commit()
+        session.close()
     
     def test_set_and_get_secret(self):
         """Test setting and retrieving a secret."""
@@ -229,14 +177,14 @@ class TestSecretStore(unittest.TestCase):
         self.secret_store.set_secret(key, value)
         
         # Get from database directly to verify encryption
-        from models.secret import Secret
-        session = self.secret_store.session_factory()
-        secret_obj = session.query(Secret).filter(Secret.key == key).first()
-        session.close()
+        with self.engine.connect() as conn:
+            encrypted_value = conn.execute(
+                text('SELECT encrypted_value FROM secrets WHERE key = :k'), {'k': key}
+            ).scalar_one_or_none()
         
         # Verify that stored value is encrypted (not equal to original)
-        self.assertIsNotNone(secret_obj)
-        self.assertNotEqual(secret_obj.encrypted_value, value)
+        self.assertIsNotNone(encrypted_value)
+        self.assertNotEqual(encrypted_value, value)
         
         # But decryption should work
         retrieved = self.secret_store.get_secret(key)
@@ -283,48 +231,9 @@ class TestSecretStore(unittest.TestCase):
         self.assertEqual(self.secret_store.get_secret(key), value2)
 
 
-class TestConfigSecretMasking(unittest.TestCase):
+class TestConfigSecretMasking(AuthedAppTestCase):
     """Test config secret masking functionality."""
     
-    def setUp(self):
-        """Set up test client and temporary data file."""
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        # Override paths BEFORE creating app
-        os.environ['DATA_PATH'] = self.temp_file.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        os.environ['SECRETS_ENCRYPTION_KEY'] = 'test-encryption-key-32-chars-long!!'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_file.name)
-        
-        # Set up admin for authentication
-        self.store.update_admin_password(generate_password_hash('testpass'))
-        
-        # Get auth token
-        login_response = self.client.post('/api/auth/login',
-            json={'username': 'admin', 'password': 'testpass'},
-            content_type='application/json'
-        )
-        self.token = json.loads(login_response.data)['data']['token']
-        self.auth_header = {'Authorization': f'Bearer {self.token}'}
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
-    
     def test_config_update_returns_unmasked_sensitive_fields(self):
         """Test that sensitive fields are returned without masking."""
         config = self.store.get_config()
@@ -332,28 +241,25 @@ class TestConfigSecretMasking(unittest.TestCase):
         
         response = self.client.put('/api/config',
             json=config,
-            headers=self.auth_header,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         
         returned_token = data['data']['telegram']['botToken']
         self.assertEqual(returned_token, 'my-secret-bot-token-12345')
     
     def test_config_get_returns_unmasked_sensitive_fields(self):
         """Test that GET config returns unmasked values."""
-        config = self.store.get_config()
-        config['telegram']['botToken'] = 'my-secret-bot-token-12345'
-        self.store.update_config(config)
+        self.store.patch_config(['telegram', 'botToken'], 'my-secret-bot-token-12345')
         
         response = self.client.get('/api/config',
             headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         
         returned_token = data['data']['telegram']['botToken']
         self.assertEqual(returned_token, 'my-secret-bot-token-12345')
@@ -365,7 +271,7 @@ class TestConfigSecretMasking(unittest.TestCase):
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         
         # Check that flag exists
         self.assertIn('cloud115', data['data'])
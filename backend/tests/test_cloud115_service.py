@@ -1,73 +1,55 @@
 import unittest
 import json
-import tempfile
-import os
+from collections import namedtuple
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, MagicMock
-from werkzeug.security import generate_password_hash
 
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from main import create_app
-from persistence.store import DataStore
-from models.database import init_db, get_session_factory
-from services.secret_store import SecretStore
+from tests.base import AuthedAppTestCase, FakeSecretStore
 from services.cloud115_service import Cloud115Service
 
 
+# Plain stand-in for the objects fs.listdir yields
+Entry = namedtuple('Entry', 'id name is_directory timestamp')
+
+# Stored 115 cookie payload; cloud115_cookies is kept unencrypted by SecretStore
+_COOKIES_JSON = json.dumps({'UID': 'test123'})
+
+# Request bodies, serialised once and posted as raw JSON
+_FILE_ID_BODY = json.dumps({'fileId': '12345'}).encode()
+_RENAME_BODY = json.dumps({'fileId': '12345', 'newName': 'new_file.txt'}).encode()
+_MOVE_BODY = json.dumps({'fileId': '12345', 'targetCid': '67890'}).encode()
+_OFFLINE_BODY = json.dumps({'sourceUrl': 'https://example.com/file.zip', 'saveCid': '67890'}).encode()
+_SYNC_TASK_BODY = json.dumps({'sourceUrl': 'https://example.com/file.zip', 'saveCid': '123456789'}).encode()
+
 class TestCloud115Service(unittest.TestCase):
     """Test Cloud115Service class."""
     
     def setUp(self):
-        """Set up test environment."""
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        os.environ['SECRETS_ENCRYPTION_KEY'] = 'test-encryption-key-32-chars-long!!'
-        
-        engine = init_db()
-        session_factory = get_session_factory(engine)
-        self.secret_store = SecretStore(session_factory)
+        """Give each test an empty secret store and a fresh fake client."""
+        self.secret_store = FakeSecretStore()
         self.service = Cloud115Service(self.secret_store)
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
+        self.service.set_qps(1000)
+        
+        # The real client lookup runs; only the p115client module is faked
+        self.fake_client = SimpleNamespace(fs=Mock(), offline=Mock())
+        self.service.p115client = SimpleNamespace(P115Client=lambda cookies: self.fake_client)
     
     def test_list_directory_no_cookies(self):
         """Test listing directory without cookies stored."""
         result = self.service.list_directory('0')
         
         self.assertFalse(result['success'])
-        self.assertIn('error', result)
+        self.assertIn('未找到任何 115 登录凭证', result['error'])
     
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_list_directory_with_client(self, mock_client):
+    def test_list_directory_with_client(self):
         """Test listing directory with mocked p115client."""
         # Set up cookies
-        self.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
-        
-        # Mock client
-        mock_fs = Mock()
-        mock_entry1 = Mock()
-        mock_entry1.id = '101'
-        mock_entry1.name = '电影 (Movies)'
-        mock_entry1.is_directory = True
-        mock_entry1.timestamp = 1698192000
-        
-        mock_entry2 = Mock()
-        mock_entry2.id = '102'
-        mock_entry2.name = '电视剧 (TV Shows)'
-        mock_entry2.is_directory = True
-        mock_entry2.timestamp = 1698278400
-        
-        mock_fs.listdir.return_value = [mock_entry1, mock_entry2]
+        self.secret_store.set_secret('cloud115_cookies', _COOKIES_JSON)
         
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
+        self.fake_client.fs.listdir.return_value = [
+            Entry('101', '电影 (Movies)', True, 1698192000),
+            Entry('102', '电视剧 (TV Shows)', True, 1698278400),
+        ]
         
         result = self.service.list_directory('0')
         
@@ -77,91 +59,33 @@ class TestCloud115Service(unittest.TestCase):
         self.assertEqual(result['data'][0]['name'], '电影 (Movies)')
         self.assertTrue(result['data'][0]['children'])
     
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_rename_file(self, mock_client):
-        """Test renaming a file."""
-        self.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
-        
-        mock_fs = Mock()
-        mock_fs.rename = Mock()
-        
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
-        
-        result = self.service.rename_file('12345', 'new_name.txt')
-        
-        self.assertTrue(result['success'])
-        self.assertEqual(result['data']['fileId'], '12345')
-        self.assertEqual(result['data']['newName'], 'new_name.txt')
-        mock_fs.rename.assert_called_once_with('12345', 'new_name.txt')
-    
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_move_file(self, mock_client):
-        """Test moving a file."""
-        self.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
-        
-        mock_fs = Mock()
-        mock_fs.move = Mock()
-        
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
-        
-        result = self.service.move_file('12345', '67890')
-        
-        self.assertTrue(result['success'])
-        self.assertEqual(result['data']['fileId'], '12345')
-        self.assertEqual(result['data']['targetCid'], '67890')
-        mock_fs.move.assert_called_once_with('12345', '67890')
+    def test_file_operations(self):
+        """Test rename, move, delete and download link against the fake fs."""
+        self.secret_store.set_secret('cloud115_cookies', _COOKIES_JSON)
+        
+        url = 'https://example.com/download/file.zip'
+        self.fake_client.fs.get_url.return_value = url
+        
+        cases = [
+            ('rename_file', ('12345', 'new_name.txt'), 'rename', {'fileId': '12345', 'newName': 'new_name.txt'}),
+            ('move_file', ('12345', '67890'), 'move', {'fileId': '12345', 'targetCid': '67890'}),
+            ('delete_file', ('12345',), 'delete', {'fileId': '12345'}),
+            ('get_download_link', ('12345',), 'get_url', {'fileId': '12345', 'url': url}),
+        ]
+        
+        for method, args, fs_attr, expected in cases:
+            with self.subTest(method):
+                result = getattr(self.service, method)(*args)
+                
+                self.assertTrue(result['success'])
+                self.assertEqual({key: result['data'][key] for key in expected}, expected)
+                getattr(self.fake_client.fs, fs_attr).assert_called_once_with(*args)
     
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_delete_file(self, mock_client):
-        """Test deleting a file."""
-        self.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
-        
-        mock_fs = Mock()
-        mock_fs.delete = Mock()
-        
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
-        
-        result = self.service.delete_file('12345')
-        
-        self.assertTrue(result['success'])
-        self.assertEqual(result['data']['fileId'], '12345')
-        mock_fs.delete.assert_called_once_with('12345')
-    
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_get_download_link(self, mock_client):
-        """Test getting download link."""
-        self.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
-        
-        mock_fs = Mock()
-        mock_fs.get_url = Mock(return_value='https://example.com/download/file.zip')
-        
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
-        
-        result = self.service.get_download_link('12345')
-        
-        self.assertTrue(result['success'])
-        self.assertEqual(result['data']['fileId'], '12345')
-        self.assertEqual(result['data']['url'], 'https://example.com/download/file.zip')
-    
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_create_offline_task(self, mock_client):
+    def test_create_offline_task(self):
         """Test creating offline task."""
-        self.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
-        
-        mock_offline = Mock()
-        mock_offline.add_url = Mock(return_value={'task_id': 'task_12345'})
+        self.secret_store.set_secret('cloud115_cookies', _COOKIES_JSON)
         
-        mock_client_instance = Mock()
-        mock_client_instance.offline = mock_offline
-        mock_client.return_value = mock_client_instance
+        self.fake_client.offline.add_url.return_value = {'task_id': 'task_12345'}
         
         result = self.service.create_offline_task('https://example.com/file.zip', '67890')
         
@@ -170,10 +94,9 @@ class TestCloud115Service(unittest.TestCase):
         self.assertEqual(result['data']['sourceUrl'], 'https://example.com/file.zip')
         self.assertEqual(result['data']['saveCid'], '67890')
     
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_get_offline_task_status(self, mock_client):
+    def test_get_offline_task_status(self):
         """Test getting offline task status."""
-        self.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
+        self.secret_store.set_secret('cloud115_cookies', _COOKIES_JSON)
         
         mock_task = {
             'task_id': 'task_12345',
@@ -182,12 +105,7 @@ class TestCloud115Service(unittest.TestCase):
             'speed': 1024000
         }
         
-        mock_offline = Mock()
-        mock_offline.list = Mock(return_value=[mock_task])
-        
-        mock_client_instance = Mock()
-        mock_client_instance.offline = mock_offline
-        mock_client.return_value = mock_client_instance
+        self.fake_client.offline.list.return_value = [mock_task]
         
         result = self.service.get_offline_task_status('task_12345')
         
@@ -197,46 +115,64 @@ class TestCloud115Service(unittest.TestCase):
         self.assertEqual(result['data']['speed'], 1024000)
 
 
-class TestCloud115Endpoints(unittest.TestCase):
-    """Test cloud115 blueprint endpoints."""
+class TestCloud115ClientCache(unittest.TestCase):
+    """Test reuse of the authenticated client across service calls."""
     
     def setUp(self):
-        """Set up test client and temporary data file."""
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATA_PATH'] = self.temp_file.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        os.environ['SECRETS_ENCRYPTION_KEY'] = 'test-encryption-key-32-chars-long!!'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_file.name)
-        
-        # Set up admin for authentication
-        self.store.update_admin_password(generate_password_hash('testpass'))
-        
-        # Get auth token
-        login_response = self.client.post('/api/auth/login',
-            json={'username': 'admin', 'password': 'testpass'},
-            content_type='application/json'
+        self.secret_store = FakeSecretStore()
+        self.secret_store.set_secret('cloud115_cookies', _COOKIES_JSON)
+        self.service = Cloud115Service(self.secret_store)
+        self.service.p115client = Mock()  # p115client itself is optional
+        self.service.set_qps(1000)
+    
+    @patch.object(Cloud115Service, '_create_authenticated_client')
+    def test_client_reused_until_credentials_change(self, mock_create):
+        """Test the client is built once and rebuilt only after the cookies change."""
+        mock_fs = Mock()
+        mock_fs.listdir.return_value = []
+        mock_create.return_value = SimpleNamespace(fs=mock_fs)
+        
+        self.assertTrue(self.service.list_directory('0')['success'])
+        self.assertTrue(self.service.list_directory('0')['success'])
+        self.assertEqual(mock_create.call_count, 1)
+        
+        self.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test456'}))
+        self.service.list_directory('0')
+        self.assertEqual(mock_create.call_count, 2)
+    
+    @patch.object(Cloud115Service, '_create_authenticated_client')
+    def test_client_rebuilt_after_auth_failure(self, mock_create):
+        """Test an expired-login error drops the cached client but other errors keep it."""
+        mock_fs = Mock()
+        mock_create.return_value = SimpleNamespace(fs=mock_fs)
+        
+        mock_fs.listdir.side_effect = OSError('network down')
+        self.assertFalse(self.service.list_directory('0')['success'])
+        self.service.list_directory('0')
+        self.assertEqual(mock_create.call_count, 1)
+        
+        mock_fs.listdir.side_effect = OSError(99, {'state': False, 'errno': 99, 'error': '请重新登录'})
+        self.assertFalse(self.service.list_directory('0')['success'])
+        mock_fs.listdir.side_effect = None
+        mock_fs.listdir.return_value = []
+        self.assertTrue(self.service.list_directory('0')['success'])
+        self.assertEqual(mock_create.call_count, 2)
+
+
+class TestCloud115Endpoints(AuthedAppTestCase):
+    """Test cloud115 blueprint endpoints."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Patch the client lookup once for the class."""
+        super().setUpClass()
+        cls.mock_client = cls.enterClassContext(
+            patch.object(Cloud115Service, '_get_authenticated_client')
         )
-        self.token = json.loads(login_response.data)['data']['token']
-        self.auth_header = {'Authorization': f'Bearer {self.token}'}
     
-    def tearDown(self):
-        """Clean up temporary files."""
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
+    def setUp(self):
+        super().setUp()
+        self.mock_client.reset_mock(return_value=True, side_effect=True)
     
     def test_list_directories_without_auth(self):
         """Test listing directories without authentication."""
@@ -246,201 +182,97 @@ class TestCloud115Endpoints(unittest.TestCase):
     
     def test_list_directories_no_cookies(self):
         """Test listing directories without cookies stored."""
+        self.mock_client.side_effect = ValueError('未找到任何 115 登录凭证，请先登录')
+        
         response = self.client.get('/api/115/directories?cid=0',
             headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_list_directories_success(self, mock_client):
+    def test_list_directories_success(self):
         """Test listing directories successfully."""
         # Set up cookies
-        self.app.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
+        self.app.secret_store.set_secret('cloud115_cookies', _COOKIES_JSON)
         
         # Mock client
         mock_fs = Mock()
-        mock_entry = Mock()
-        mock_entry.id = '101'
-        mock_entry.name = '电影'
-        mock_entry.is_directory = True
-        mock_entry.timestamp = 1698192000
-        
-        mock_fs.listdir.return_value = [mock_entry]
+        mock_fs.listdir.return_value = [Entry('101', '电影', True, 1698192000)]
         
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
+        self.mock_client.return_value = SimpleNamespace(fs=mock_fs)
         
         response = self.client.get('/api/115/directories?cid=0',
             headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertEqual(len(data['data']), 1)
         self.assertEqual(data['data'][0]['id'], '101')
         self.assertEqual(data['data'][0]['name'], '电影')
         self.assertTrue(data['data'][0]['children'])
     
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_rename_file_success(self, mock_client):
-        """Test renaming a file successfully."""
-        self.app.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
+    def test_file_operations_success(self):
+        """Test the rename, move and delete endpoints successfully."""
+        self.app.secret_store.set_secret('cloud115_cookies', _COOKIES_JSON)
         
         mock_fs = Mock()
-        mock_fs.rename = Mock()
-        
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
-        
-        response = self.client.post('/api/115/files/rename',
-            json={
-                'fileId': '12345',
-                'newName': 'new_file.txt'
-            },
-            headers=self.auth_header,
-            content_type='application/json'
-        )
         
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-        self.assertEqual(data['data']['fileId'], '12345')
+        self.mock_client.return_value = SimpleNamespace(fs=mock_fs)
+        
+        cases = [
+            ('rename', 'POST', '/api/115/files/rename', _RENAME_BODY, ('12345', 'new_file.txt')),
+            ('move', 'POST', '/api/115/files/move', _MOVE_BODY, ('12345', '67890')),
+            ('delete', 'DELETE', '/api/115/files', _FILE_ID_BODY, ('12345',)),
+        ]
+        
+        for fs_attr, method, url, body, fs_args in cases:
+            with self.subTest(fs_attr):
+                response = self.client.open(url, method=method, data=body,
+                    content_type='application/json', headers=self.auth_header)
+                
+                data = self._ok(response)
+                self.assertEqual(data['fileId'], '12345')
+                getattr(mock_fs, fs_attr).assert_called_once_with(*fs_args)
     
     def test_rename_file_missing_params(self):
         """Test renaming without required parameters."""
         response = self.client.post('/api/115/files/rename',
-            json={
-                'fileId': '12345'
-            },
+            data=_FILE_ID_BODY,
             headers=self.auth_header,
             content_type='application/json'
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_move_file_success(self, mock_client):
-        """Test moving a file successfully."""
-        self.app.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
-        
-        mock_fs = Mock()
-        mock_fs.move = Mock()
-        
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
-        
-        response = self.client.post('/api/115/files/move',
-            json={
-                'fileId': '12345',
-                'targetCid': '67890'
-            },
-            headers=self.auth_header,
-            content_type='application/json'
-        )
-        
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-    
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_delete_file_success(self, mock_client):
-        """Test deleting a file successfully."""
-        self.app.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
-        
-        mock_fs = Mock()
-        mock_fs.delete = Mock()
-        
-        mock_client_instance = Mock()
-        mock_client_instance.fs = mock_fs
-        mock_client.return_value = mock_client_instance
-        
-        response = self.client.delete('/api/115/files',
-            json={
-                'fileId': '12345'
-            },
-            headers=self.auth_header,
-            content_type='application/json'
-        )
-        
-        self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
-        self.assertTrue(data['success'])
-    
-    @patch('services.cloud115_service.Cloud115Service._get_authenticated_client')
-    def test_create_offline_task_via_files_endpoint(self, mock_client):
+    def test_create_offline_task_via_files_endpoint(self):
         """Test creating offline task via /api/115/files/offline."""
-        self.app.secret_store.set_secret('cloud115_cookies', json.dumps({'UID': 'test123'}))
+        self.app.secret_store.set_secret('cloud115_cookies', _COOKIES_JSON)
         
         mock_offline = Mock()
-        mock_offline.add_url = Mock(return_value={'task_id': 'task_12345'})
+        mock_offline.add_url.return_value = {'task_id': 'task_12345'}
         
-        mock_client_instance = Mock()
-        mock_client_instance.offline = mock_offline
-        mock_client.return_value = mock_client_instance
+        self.mock_client.return_value = SimpleNamespace(offline=mock_offline)
         
         response = self.client.post('/api/115/files/offline',
-            json={
-                'sourceUrl': 'https://example.com/file.zip',
-                'saveCid': '67890'
-            },
+            data=_OFFLINE_BODY,
             headers=self.auth_header,
             content_type='application/json'
         )
         
         self.assertEqual(response.status_code, 201)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
 
 
-class TestOfflineTaskSync(unittest.TestCase):
+class TestOfflineTaskSync(AuthedAppTestCase):
     """Test offline task sync with 115 API."""
     
-    def setUp(self):
-        """Set up test environment."""
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-        
-        os.environ['DATA_PATH'] = self.temp_file.name
-        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
-        os.environ['TESTING'] = 'true'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_file.name)
-        
-        # Set up admin credentials
-        self.store.update_admin_password(generate_password_hash('testpass123'))
-        
-        # Get JWT token
-        login_response = self.client.post('/api/auth/login',
-            json={'username': 'admin', 'password': 'testpass123'},
-            content_type='application/json'
-        )
-        self.token = json.loads(login_response.data)['data']['token']
-        self.headers = {'Authorization': f'Bearer {self.token}'}
-    
-    def tearDown(self):
-        """Clean up temporary file."""
-        if self.app.task_poller:
-            self.app.task_poller.stop()
-        
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
-    
     @patch('services.cloud115_service.Cloud115Service.get_offline_task_status')
     def test_sync_updates_task_status(self, mock_get_status):
         """Test that sync updates task status from 115 API."""
@@ -448,14 +280,11 @@ class TestOfflineTaskSync(unittest.TestCase):
         from models.offline_task import TaskStatus
         
         create_response = self.client.post('/api/115/offline/tasks',
-            json={
-                'sourceUrl': 'https://example.com/file.zip',
-                'saveCid': '123456789'
-            },
-            headers=self.headers,
+            data=_SYNC_TASK_BODY,
+            headers=self.auth_header,
             content_type='application/json'
         )
-        task_id = json.loads(create_response.data)['data']['id']
+        task_id = create_response.get_json()['data']['id']
         
         # Manually set p115_task_id
         task = self.app.offline_task_service.get_task(task_id)
@@ -1,189 +1,181 @@
 import unittest
 import json
-import tempfile
-import os
-from unittest.mock import Mock, patch, MagicMock
-from datetime import datetime
-
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from collections import namedtuple
+from unittest.mock import DEFAULT, Mock, patch
 
+from tests.base import FakeSecretStore, api_response
 from services.cloud123_service import Cloud123Service
-from services.secret_store import SecretStore
-from models.database import init_db, get_session_factory
+
+
+# Plain stand-in for the offline tasks p123client lists
+OfflineTask = namedtuple('OfflineTask', 'task_id status progress speed')
 
 
 class TestCloud123Service(unittest.TestCase):
     """Test Cloud123Service functionality."""
     
+    @classmethod
+    def setUpClass(cls):
+        """Patch the HTTP layer once for the class."""
+        # Stop at the HTTP layer so _make_api_request runs for real: a fixed access
+        # token, no rate-limit sleeps, and canned responses from requests
+        cls.mock_get_token = cls.enterClassContext(patch.object(Cloud123Service, '_get_access_token'))
+        cls.enterClassContext(patch.object(Cloud123Service, '_wait_for_rate_limit'))
+        cls.mock_http = cls.enterClassContext(
+            patch.multiple('services.cloud123_service.requests', get=DEFAULT, post=DEFAULT, delete=DEFAULT)
+        )
+    
     def setUp(self):
-        """Set up test fixtures."""
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        # Override database URL before creating db
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        os.environ['SECRETS_ENCRYPTION_KEY'] = 'test-encryption-key-32-chars-long!!'
-        
-        self.engine = init_db()
-        self.session_factory = get_session_factory(self.engine)
-        self.secret_store = SecretStore(self.session_factory)
+        """Give each test an empty secret store and reset the HTTP mocks."""
+        self.secret_store = FakeSecretStore()
+        self.mock_get_token.reset_mock(return_value=True, side_effect=True)
+        self.mock_get_token.return_value = 'test-token'
+        for mock in self.mock_http.values():
+            mock.reset_mock(return_value=True, side_effect=True)
         self.service = Cloud123Service(self.secret_store)
     
-    def tearDown(self):
-        """Clean up temporary files."""
-        if os.path.exists(self.temp_db.name):
-            os.unlink(self.temp_db.name)
-    
     def test_list_directory_no_credentials(self):
         """Test listing directory without credentials fails gracefully."""
+        self.mock_get_token.return_value = None
+        
         result = self.service.list_directory('/')
         
         self.assertFalse(result.get('success'))
-        self.assertIn('error', result)
+        self.assertIn('access token', result['error'])
+        self.mock_http['get'].assert_not_called()
     
-    @patch.object(Cloud123Service, '_get_authenticated_client')
-    def test_list_directory_success(self, mock_get_client):
-        """Test listing directory with mocked client."""
-        # Create mock entries with proper attribute setup
-        mock_entry1 = Mock()
-        mock_entry1.configure_mock(
-            id='file-1',
-            name='Document.pdf',
-            is_dir=False,
-            is_directory=False,
-            timestamp=1609459200
-        )
-        
-        mock_entry2 = Mock()
-        mock_entry2.configure_mock(
-            id='dir-1',
-            name='Downloads',
-            is_dir=True,
-            is_directory=True,
-            timestamp=1609459200
-        )
-        
-        mock_client = Mock()
-        mock_client.list_files.return_value = [mock_entry1, mock_entry2]
-        mock_get_client.return_value = mock_client
+    def test_list_directory_success(self):
+        """Test listing directory through the REST API."""
+        self.mock_http['get'].return_value = api_response({'fileList': [
+            {'fileId': 1, 'filename': 'Document.pdf', 'type': 0, 'updateTime': '2021-01-01 08:00:00'},
+            {'fileId': 2, 'filename': 'Downloads', 'type': 1, 'updateTime': '2021-01-01 08:00:00'},
+        ]})
         
         result = self.service.list_directory('/')
         
         self.assertTrue(result.get('success'))
         self.assertEqual(len(result['data']), 2)
+        self.assertEqual(self.mock_http['get'].call_args.kwargs['params'], {'parentFileId': 0, 'limit': 100})
         
         # Check first entry
-        self.assertEqual(result['data'][0]['id'], 'file-1')
+        self.assertEqual(result['data'][0]['id'], '1')
         self.assertEqual(result['data'][0]['name'], 'Document.pdf')
         self.assertFalse(result['data'][0]['children'])
         self.assertEqual(result['data'][0]['date'], '2021-01-01')
         
         # Check second entry
-        self.assertEqual(result['data'][1]['id'], 'dir-1')
+        self.assertEqual(result['data'][1]['id'], '2')
         self.assertEqual(result['data'][1]['name'], 'Downloads')
         self.assertTrue(result['data'][1]['children'])
     
-    @patch.object(Cloud123Service, '_get_authenticated_client')
-    def test_rename_file_success(self, mock_get_client):
+    def test_rename_file_success(self):
         """Test renaming a file."""
-        mock_client = Mock()
-        mock_client.rename = Mock()
-        mock_get_client.return_value = mock_client
+        self.mock_http['post'].return_value = api_response()
         
-        result = self.service.rename_file('file-123', 'NewName.pdf')
+        result = self.service.rename_file('123', 'NewName.pdf')
         
         self.assertTrue(result.get('success'))
-        self.assertEqual(result['data']['fileId'], 'file-123')
+        self.assertEqual(result['data']['fileId'], '123')
         self.assertEqual(result['data']['newName'], 'NewName.pdf')
-        mock_client.rename.assert_called_once_with('file-123', 'NewName.pdf')
+        url = self.mock_http['post'].call_args.args[0]
+        self.assertTrue(url.endswith('/api/v1/file/rename'))
+        self.assertEqual(self.mock_http['post'].call_args.kwargs['json'], {'fileId': 123, 'fileName': 'NewName.pdf'})
     
-    @patch.object(Cloud123Service, '_get_authenticated_client')
-    def test_move_file_success(self, mock_get_client):
+    def test_move_file_success(self):
         """Test moving a file."""
-        mock_client = Mock()
-        mock_client.move = Mock()
-        mock_get_client.return_value = mock_client
+        self.mock_http['post'].return_value = api_response()
         
-        result = self.service.move_file('file-123', '/destination')
+        result = self.service.move_file('123', '456')
         
         self.assertTrue(result.get('success'))
-        self.assertEqual(result['data']['fileId'], 'file-123')
-        self.assertEqual(result['data']['targetDirId'], '/destination')
-        mock_client.move.assert_called_once_with('file-123', '/destination')
+        self.assertEqual(result['data']['fileId'], '123')
+        self.assertEqual(result['data']['targetDirId'], '456')
+        self.assertEqual(self.mock_http['post'].call_args.kwargs['json'], {'fileIds': [123], 'toParentFileId': 456})
     
-    @patch.object(Cloud123Service, '_get_authenticated_client')
-    def test_delete_file_success(self, mock_get_client):
+    def test_delete_file_success(self):
         """Test deleting a file."""
-        mock_client = Mock()
-        mock_client.delete = Mock()
-        mock_get_client.return_value = mock_client
+        self.mock_http['post'].return_value = api_response()
         
-        result = self.service.delete_file('file-123')
+        result = self.service.delete_file('123')
         
         self.assertTrue(result.get('success'))
-        self.assertEqual(result['data']['fileId'], 'file-123')
-        mock_client.delete.assert_called_once_with('file-123')
+        self.assertEqual(result['data']['fileId'], '123')
+        url = self.mock_http['post'].call_args.args[0]
+        self.assertTrue(url.endswith('/api/v1/file/trash'))
+        self.assertEqual(self.mock_http['post'].call_args.kwargs['json'], {'fileIds': [123]})
     
-    @patch.object(Cloud123Service, '_get_authenticated_client')
-    def test_get_download_link_success(self, mock_get_client):
+    def test_get_download_link_success(self):
         """Test getting download link."""
-        mock_client = Mock()
-        mock_client.get_download_url.return_value = 'https://example.com/download?token=abc123'
-        mock_get_client.return_value = mock_client
+        self.mock_http['get'].return_value = api_response({'downloadUrl': 'https://example.com/download?token=abc123'})
         
-        result = self.service.get_download_link('file-123')
+        result = self.service.get_download_link('123')
         
         self.assertTrue(result.get('success'))
-        self.assertEqual(result['data']['fileId'], 'file-123')
+        self.assertEqual(result['data']['fileId'], '123')
         self.assertEqual(result['data']['url'], 'https://example.com/download?token=abc123')
     
-    @patch.object(Cloud123Service, '_get_authenticated_client')
-    def test_create_offline_task_success(self, mock_get_client):
+    def test_create_offline_task_success(self):
         """Test creating an offline task."""
-        mock_client = Mock()
-        mock_client.add_offline_task.return_value = {'task_id': 'task-123', 'status': 'pending'}
-        mock_get_client.return_value = mock_client
+        self.mock_http['post'].return_value = api_response({'taskId': 789})
         
-        result = self.service.create_offline_task('https://example.com/file.zip', '/')
+        result = self.service.create_offline_task('https://example.com/file.zip', '0')
         
         self.assertTrue(result.get('success'))
-        self.assertEqual(result['data']['p123TaskId'], 'task-123')
+        self.assertEqual(result['data']['p123TaskId'], '789')
         self.assertEqual(result['data']['sourceUrl'], 'https://example.com/file.zip')
-        self.assertEqual(result['data']['saveDirId'], '/')
+        self.assertEqual(result['data']['saveDirId'], '0')
     
-    @patch.object(Cloud123Service, '_get_authenticated_client')
-    def test_get_offline_task_status_success(self, mock_get_client):
+    def test_get_offline_task_status_success(self):
         """Test getting offline task status."""
-        mock_task = Mock()
-        mock_task.task_id = 'task-123'
-        mock_task.status = '2'  # completed
-        mock_task.progress = 100
-        mock_task.speed = 1024000
-        
-        mock_client = Mock()
-        mock_client.list_offline_tasks.return_value = [mock_task]
-        mock_get_client.return_value = mock_client
+        client = Mock()
+        client.list_offline_tasks.return_value = [
+            OfflineTask('task-123', '2', 100, 1024000)  # status 2: completed
+        ]
         
-        result = self.service.get_offline_task_status('task-123')
+        with patch.object(Cloud123Service, '_get_p123_client', return_value=client):
+            result = self.service.get_offline_task_status('task-123')
         
         self.assertTrue(result.get('success'))
         self.assertEqual(result['data']['status'], 'completed')
         self.assertEqual(result['data']['progress'], 100)
         self.assertEqual(result['data']['speed'], 1024000.0)
     
-    @patch.object(Cloud123Service, '_get_authenticated_client')
-    def test_get_offline_task_status_not_found(self, mock_get_client):
+    def test_get_offline_task_status_not_found(self):
         """Test getting status of non-existent task."""
-        mock_client = Mock()
-        mock_client.list_offline_tasks.return_value = []
-        mock_get_client.return_value = mock_client
+        client = Mock()
+        client.list_offline_tasks.return_value = []
         
-        result = self.service.get_offline_task_status('non-existent')
+        with patch.object(Cloud123Service, '_get_p123_client', return_value=client):
+            result = self.service.get_offline_task_status('non-existent')
         
         self.assertFalse(result.get('success'))
         self.assertIn('not found', result.get('error', '').lower())
     
+    def test_get_offline_task_status_mapping(self):
+        """Test each raw task status maps onto the OfflineTask status names."""
+        cases = {
+            '1': 'downloading', '2': 'completed', '-1': 'failed', '0': 'pending',
+            'seeding': 'completed', 'paused': 'pending', 'unknown': 'pending',
+        }
+        client = Mock()
+        
+        with patch.object(Cloud123Service, '_get_p123_client', return_value=client):
+            for raw_status, expected in cases.items():
+                with self.subTest(raw_status=raw_status):
+                    client.list_offline_tasks.return_value = [OfflineTask('task-123', raw_status, 0, 0)]
+                    
+                    result = self.service.get_offline_task_status('task-123')
+                    
+                    self.assertEqual(result['data']['status'], expected)
+    
+    def test_get_offline_task_status_no_client(self):
+        """Test a missing p123client or login fails gracefully."""
+        with patch.object(Cloud123Service, '_get_p123_client', return_value=None):
+            result = self.service.get_offline_task_status('task-123')
+        
+        self.assertFalse(result.get('success'))
+        self.assertIn('p123client', result['error'])
+    
     def test_get_session_metadata_empty(self):
         """Test getting session metadata when none exists."""
         metadata = self.service.get_session_metadata()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from tests.base import TEST_DATA_DIR
+from models.database import AppDataBase
+from models.config import ConfigEntry
+from persistence.db_config_store import DbConfigStore
+
+
+class TestDbConfigStoreUpdate(unittest.TestCase):
+    """Test DbConfigStore.update_config writes against the stored rows."""
+
+    def setUp(self):
+        """Create a file database two stores can share, like two gunicorn workers."""
+        fd, self.db_path = tempfile.mkstemp(suffix='.db', dir=TEST_DATA_DIR)
+        os.close(fd)
+        self.engine = create_engine(f'sqlite:///{self.db_path}')
+        AppDataBase.metadata.create_all(self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.store = DbConfigStore(self.session_factory)
+
+        # Count the statements that write to config_entries
+        self.writes = []
+        event.listen(self.engine, 'before_cursor_execute', self._record_write)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.unlink(self.db_path)
+
+    def _record_write(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('INSERT', 'UPDATE')):
+            self.writes.append(statement)
+
+    def _stored(self, key):
+        session = self.session_factory()
+        try:
+            return session.get(ConfigEntry, key).get_value()
+        finally:
+            session.close()
+
+    def test_changed_leaf_is_written(self):
+        """Test a save writes only the leaf whose value changed."""
+        self.store.update_config({'proxy': {'host': '1.1.1.1', 'port': '7890'}})
+        self.writes.clear()
+
+        self.store.update_config({'proxy': {'host': '2.2.2.2', 'port': '7890'}})
+
+        self.assertEqual(self._stored('proxy.host'), '2.2.2.2')
+        self.assertEqual(self._stored('proxy.port'), '7890')
+        self.assertEqual(len(self.writes), 1)
+
+    def test_unchanged_save_writes_nothing(self):
+        """Test re-saving identical values issues no INSERT or UPDATE."""
+        config = {'proxy': {'host': '1.1.1.1', 'enabled': True}}
+        self.store.update_config(config)
+        self.writes.clear()
+
+        self.store.update_config(config)
+
+        self.assertEqual(self.writes, [])
+        self.assertEqual(self._stored('proxy.host'), '1.1.1.1')
+
+    def test_save_matching_stale_cache_is_written(self):
+        """Test a save is compared with the database, not another process's cache."""
+        other = DbConfigStore(self.session_factory)
+        self.store.update_config({'proxy': {'host': '1.1.1.1'}})
+        self.store.get_config()  # cache proxy.host = 1.1.1.1
+
+        other.update_config({'proxy': {'host': '2.2.2.2'}})
+        self.store.update_config({'proxy': {'host': '1.1.1.1'}})
+
+        self.assertEqual(self._stored('proxy.host'), '1.1.1.1')
+
+
+if __name__ == '__main__':
+    unittest.main()
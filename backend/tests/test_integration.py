@@ -12,67 +12,37 @@ This test verifies:
 
 import unittest
 import json
-import tempfile
-import os
 from unittest.mock import patch, MagicMock
-from werkzeug.security import generate_password_hash
 import pyotp
 
-import sys
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from tests.base import AppTestCase, AuthedAppTestCase, fast_password_hash
 
-from main import create_app
-from persistence.store import DataStore
 
+# (section, field) pairs the frontend reads from GET /api/config
+_REQUIRED_FIELDS = [
+    ('telegram', 'botToken'),
+    ('telegram', 'adminUserId'),
+    ('telegram', 'whitelistMode'),
+    ('cloud115', 'cookies'),
+    ('cloud115', 'downloadPath'),
+    ('cloud123', 'clientId'),
+    ('cloud123', 'enabled'),
+]
 
-class TestIntegrationConfigAPI(unittest.TestCase):
+# Sensitive fields and the values written to them; they must round-trip unmasked
+_SENSITIVE_FIELDS = [
+    ('telegram', 'botToken', 'sensitive-bot-token-value'),
+    ('cloud115', 'cookies', 'sensitive-cookies-value'),
+    ('tmdb', 'apiKey', 'sensitive-tmdb-key'),
+]
+
+
+class TestIntegrationConfigAPI(AuthedAppTestCase):
     """Test Config API (/api/config) - Module 1"""
     
-    def setUp(self):
-        """Set up test client and temporary data files."""
-        self.temp_yaml = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_yaml.close()
-        
-        self.temp_json = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_json.close()
-        
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATA_PATH'] = self.temp_json.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_yaml.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_json.name, self.temp_yaml.name)
-        
-        # Set up default password for testing
-        self.store.update_admin_password(generate_password_hash('testpass'))
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        for f in [self.temp_yaml.name, self.temp_json.name, self.temp_db.name]:
-            if os.path.exists(f):
-                os.unlink(f)
-    
-    def _get_token(self):
-        """Get JWT token for authenticated requests."""
-        resp = self.client.post('/api/auth/login', 
-            json={'username': 'admin', 'password': 'testpass'})
-        return json.loads(resp.data)['data']['token']
-    
     def test_config_get_full_structure(self):
         """✓ GET /api/config: Verify complete config structure with all sections."""
-        token = self._get_token()
-        headers = {'Authorization': f'Bearer {token}'}
-        
-        response = self.client.get('/api/config', headers=headers)
+        response = self.client.get('/api/config', headers=self.auth_header)
         self.assertEqual(response.status_code, 200)
         
         data = json.loads(response.data)
@@ -88,23 +58,13 @@ class TestIntegrationConfigAPI(unittest.TestCase):
             self.assertIn(section, config, f"Missing config section: {section}")
         
         # Verify section-specific fields
-        self.assertIn('botToken', config['telegram'])
-        self.assertIn('adminUserId', config['telegram'])
-        self.assertIn('whitelistMode', config['telegram'])
-        
-        self.assertIn('cookies', config['cloud115'])
-        self.assertIn('downloadPath', config['cloud115'])
-        
-        self.assertIn('clientId', config['cloud123'])
-        self.assertIn('enabled', config['cloud123'])
+        for section, field in _REQUIRED_FIELDS:
+            self.assertIn(field, config[section], f"Missing config field: {section}.{field}")
         
     def test_config_post_saves_config(self):
         """✓ POST /api/config: Save config and verify YAML persistence."""
-        token = self._get_token()
-        headers = {'Authorization': f'Bearer {token}'}
-        
         # Get current config
-        response = self.client.get('/api/config', headers=headers)
+        response = self.client.get('/api/config', headers=self.auth_header)
         config = json.loads(response.data)['data']
         
         # Modify config
@@ -112,7 +72,7 @@ class TestIntegrationConfigAPI(unittest.TestCase):
         config['telegram']['adminUserId'] = '123456789'
         
         # POST the config
-        response = self.client.post('/api/config', json=config, headers=headers)
+        response = self.client.post('/api/config', json=config, headers=self.auth_header)
         self.assertEqual(response.status_code, 200)
         
         data = json.loads(response.data)
@@ -125,11 +85,8 @@ class TestIntegrationConfigAPI(unittest.TestCase):
     
     def test_config_put_partial_update(self):
         """✓ PUT /api/config: Update partial config fields."""
-        token = self._get_token()
-        headers = {'Authorization': f'Bearer {token}'}
-        
         # Get current config
-        response = self.client.get('/api/config', headers=headers)
+        response = self.client.get('/api/config', headers=self.auth_header)
         config = json.loads(response.data)['data']
         
         # Only modify specific fields
@@ -137,7 +94,7 @@ class TestIntegrationConfigAPI(unittest.TestCase):
         config['proxy']['enabled'] = True
         
         # PUT the config
-        response = self.client.put('/api/config', json=config, headers=headers)
+        response = self.client.put('/api/config', json=config, headers=self.auth_header)
         self.assertEqual(response.status_code, 200)
         
         data = json.loads(response.data)
@@ -150,31 +107,23 @@ class TestIntegrationConfigAPI(unittest.TestCase):
     
     def test_config_no_field_masking(self):
         """✓ Verify sensitive fields are NOT masked (full transparency)."""
-        token = self._get_token()
-        headers = {'Authorization': f'Bearer {token}'}
-        
-        response = self.client.get('/api/config', headers=headers)
+        response = self.client.get('/api/config', headers=self.auth_header)
         config = json.loads(response.data)['data']
         
         # Set sensitive values
-        config['telegram']['botToken'] = 'sensitive-bot-token-value'
-        config['cloud115']['cookies'] = 'sensitive-cookies-value'
-        config['tmdb']['apiKey'] = 'sensitive-tmdb-key'
+        for section, field, value in _SENSITIVE_FIELDS:
+            config[section][field] = value
         
-        response = self.client.post('/api/config', json=config, headers=headers)
+        response = self.client.post('/api/config', json=config, headers=self.auth_header)
         updated = json.loads(response.data)['data']
         
         # Verify NO masking - values should be complete
-        self.assertEqual(updated['telegram']['botToken'], 'sensitive-bot-token-value')
-        self.assertEqual(updated['cloud115']['cookies'], 'sensitive-cookies-value')
-        self.assertEqual(updated['tmdb']['apiKey'], 'sensitive-tmdb-key')
+        for section, field, value in _SENSITIVE_FIELDS:
+            self.assertEqual(updated[section][field], value, f"{section}.{field} was altered")
     
     def test_config_session_flags(self):
         """✓ Verify session health flags (hasValidSession) are included."""
-        token = self._get_token()
-        headers = {'Authorization': f'Bearer {token}'}
-        
-        response = self.client.get('/api/config', headers=headers)
+        response = self.client.get('/api/config', headers=self.auth_header)
         config = json.loads(response.data)['data']
         
         # Session flags should be present
@@ -184,40 +133,24 @@ class TestIntegrationConfigAPI(unittest.TestCase):
         # Initially should be False (no credentials set)
         self.assertFalse(config['cloud115']['hasValidSession'])
         self.assertFalse(config['cloud123']['hasValidSession'])
+    
+    def test_config_response_does_not_leak_into_store(self):
+        """✓ Flags added to a GET response are not written back into the cached config."""
+        self.store.get_config()  # warm the cache
+        self.client.get('/api/config', headers=self.auth_header)
+        
+        config = self.store.get_config()
+        self.assertNotIn('hasValidSession', config['cloud115'])
+        self.assertNotIn('hasValidSession', config['cloud123'])
 
 
-class TestIntegrationAuthAPI(unittest.TestCase):
+class TestIntegrationAuthAPI(AppTestCase):
     """Test User Auth API (/api/auth) - Module 2"""
     
-    def setUp(self):
-        """Set up test client and temporary data files."""
-        self.temp_yaml = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_yaml.close()
-        
-        self.temp_json = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_json.close()
-        
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATA_PATH'] = self.temp_json.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_yaml.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_json.name, self.temp_yaml.name)
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        for f in [self.temp_yaml.name, self.temp_json.name, self.temp_db.name]:
-            if os.path.exists(f):
-                os.unlink(f)
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.store = cls.app.store
     
     def test_login_default_credentials(self):
         """✓ POST /api/auth/login: Default admin/password login succeeds."""
@@ -260,7 +193,7 @@ class TestIntegrationAuthAPI(unittest.TestCase):
     def test_password_change(self):
         """✓ PUT /api/auth/password: Change password successfully."""
         # Setup initial password
-        self.store.update_admin_password(generate_password_hash('oldpass'))
+        self.store.update_admin_password(fast_password_hash('oldpass'))
         
         # Login with old password
         response = self.client.post('/api/auth/login',
@@ -357,40 +290,9 @@ class TestIntegrationAuthAPI(unittest.TestCase):
         self.assertFalse(data['isAuthenticated'])
 
 
-class TestIntegrationCloud115API(unittest.TestCase):
+class TestIntegrationCloud115API(AuthedAppTestCase):
     """Test Cloud115 API (/api/115) - Module 3"""
     
-    def setUp(self):
-        """Set up test client and temporary data files."""
-        self.temp_yaml = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_yaml.close()
-        
-        self.temp_json = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_json.close()
-        
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATA_PATH'] = self.temp_json.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_yaml.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_json.name, self.temp_yaml.name)
-        self.store.update_admin_password(generate_password_hash('testpass'))
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        for f in [self.temp_yaml.name, self.temp_json.name, self.temp_db.name]:
-            if os.path.exists(f):
-                os.unlink(f)
-    
     def _get_token(self):
         """Get JWT token for authenticated requests."""
         resp = self.client.post('/api/auth/login',
@@ -520,40 +422,9 @@ class TestIntegrationCloud115API(unittest.TestCase):
         self.assertIn(response.status_code, [200, 400, 500, 201])
 
 
-class TestIntegrationCloud123API(unittest.TestCase):
+class TestIntegrationCloud123API(AuthedAppTestCase):
     """Test Cloud123 API (/api/123) - Module 4"""
     
-    def setUp(self):
-        """Set up test client and temporary data files."""
-        self.temp_yaml = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_yaml.close()
-        
-        self.temp_json = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_json.close()
-        
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATA_PATH'] = self.temp_json.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_yaml.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_json.name, self.temp_yaml.name)
-        self.store.update_admin_password(generate_password_hash('testpass'))
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        for f in [self.temp_yaml.name, self.temp_json.name, self.temp_db.name]:
-            if os.path.exists(f):
-                os.unlink(f)
-    
     def _get_token(self):
         """Get JWT token for authenticated requests."""
         resp = self.client.post('/api/auth/login',
@@ -687,40 +558,9 @@ class TestIntegrationCloud123API(unittest.TestCase):
         self.assertIn(response.status_code, [200, 400, 500])
 
 
-class TestIntegrationBotSettingsAPI(unittest.TestCase):
+class TestIntegrationBotSettingsAPI(AuthedAppTestCase):
     """Test Bot Settings API (/api/bot) - Module 5"""
     
-    def setUp(self):
-        """Set up test client and temporary data files."""
-        self.temp_yaml = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_yaml.close()
-        
-        self.temp_json = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_json.close()
-        
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATA_PATH'] = self.temp_json.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_yaml.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_json.name, self.temp_yaml.name)
-        self.store.update_admin_password(generate_password_hash('testpass'))
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        for f in [self.temp_yaml.name, self.temp_json.name, self.temp_db.name]:
-            if os.path.exists(f):
-                os.unlink(f)
-    
     def _get_token(self):
         """Get JWT token for authenticated requests."""
         resp = self.client.post('/api/auth/login',
@@ -815,40 +655,9 @@ class TestIntegrationBotSettingsAPI(unittest.TestCase):
         self.assertIn(response.status_code, [200, 400, 500])
 
 
-class TestFrontendDataConsistency(unittest.TestCase):
+class TestFrontendDataConsistency(AuthedAppTestCase):
     """Verify frontend-backend data consistency"""
     
-    def setUp(self):
-        """Set up test client and temporary data files."""
-        self.temp_yaml = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_yaml.close()
-        
-        self.temp_json = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_json.close()
-        
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATA_PATH'] = self.temp_json.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_yaml.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_json.name, self.temp_yaml.name)
-        self.store.update_admin_password(generate_password_hash('testpass'))
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        for f in [self.temp_yaml.name, self.temp_json.name, self.temp_db.name]:
-            if os.path.exists(f):
-                os.unlink(f)
-    
     def _get_token(self):
         """Get JWT token for authenticated requests."""
         resp = self.client.post('/api/auth/login',
@@ -930,38 +739,13 @@ class TestFrontendDataConsistency(unittest.TestCase):
         )
 
 
-class TestErrorHandlingAndValidation(unittest.TestCase):
+class TestErrorHandlingAndValidation(AppTestCase):
     """Test error responses and validation"""
     
-    def setUp(self):
-        """Set up test client and temporary data files."""
-        self.temp_yaml = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yml')
-        self.temp_yaml.close()
-        
-        self.temp_json = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_json.close()
-        
-        self.temp_db = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.db')
-        self.temp_db.close()
-        
-        os.environ['DATA_PATH'] = self.temp_json.name
-        os.environ['CONFIG_YAML_PATH'] = self.temp_yaml.name
-        os.environ['DATABASE_URL'] = f'sqlite:///{self.temp_db.name}'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_json.name, self.temp_yaml.name)
-    
-    def tearDown(self):
-        """Clean up temporary files."""
-        for f in [self.temp_yaml.name, self.temp_json.name, self.temp_db.name]:
-            if os.path.exists(f):
-                os.unlink(f)
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.store = cls.app.store
     
     def test_missing_auth_header(self):
         """✓ Protected endpoints reject requests without auth."""
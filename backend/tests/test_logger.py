@@ -0,0 +1,159 @@
+import logging
+import queue
+from logging.handlers import QueueListener
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+from utils.logger import (
+    ChineseFormatter, MaskingQueueHandler, TaskLogger, _RouteHandler, _RoutedQueueHandler, log_task, mask_sensitive_data,
+)
+
+
+class TestMaskSensitiveData(unittest.TestCase):
+    """Test log message masking."""
+
+    def test_masks_each_rule(self):
+        """Test every masking rule still fires."""
+        cases = [
+            ('api_key=abcdefgh12345', 'api_key=***已脱敏***'),
+            ('"Password": "hunter2hunter2"', '"Password": "***已脱敏***"'),
+            ('Authorization: Bearer eyJhbGciOi.abc', 'Authorization: Bearer ***TOKEN***'),
+            ('cookie UID=123_abc; SEID=xyz', 'cookie UID=***; SEID=***'),
+            ('user a.b@example.com', 'user ***@example.com'),
+            ('phone 13812345678', 'phone 138****5678'),
+        ]
+
+        for message, expected in cases:
+            with self.subTest(message=message):
+                self.assertEqual(mask_sensitive_data(message), expected)
+
+    def test_unmarked_message_is_unchanged(self):
+        """Test messages without any sensitive marker pass through as-is."""
+        message = '[离线下载] 进度: ██████████░░░░░░░░░░ 50% (5/10) - movie.2023.1080p.mkv'
+
+        self.assertIs(mask_sensitive_data(message), message)
+
+
+class TestMaskingQueueHandler(unittest.TestCase):
+    """Test records are masked once as they are queued."""
+
+    def test_masks_message_and_traceback(self):
+        """Test the queued record carries the masked message and traceback."""
+        log_queue = queue.SimpleQueue()
+        handler = MaskingQueueHandler(log_queue)
+        try:
+            raise ValueError('bad token=abcdefgh12345')
+        except ValueError:
+            record = logging.makeLogRecord({'msg': 'login %s', 'args': ('api_key=abcdefgh12345',)})
+            record.exc_info = sys.exc_info()
+
+        handler.handle(record)
+        queued = log_queue.get_nowait()
+
+        self.assertTrue(queued.msg.startswith('login api_key=***已脱敏***'))
+        self.assertIn('token=***已脱敏***', queued.msg)
+        self.assertNotIn('abcdefgh12345', queued.msg)
+        self.assertIsNone(queued.exc_info)
+
+
+class _CollectingHandler(logging.Handler):
+    """Record (tag, message) pairs into a shared list."""
+
+    def __init__(self, tag, seen, level=logging.NOTSET):
+        super().__init__(level)
+        self.tag = tag
+        self.seen = seen
+
+    def emit(self, record):
+        self.seen.append((self.tag, record.getMessage()))
+
+
+class TestLogRouting(unittest.TestCase):
+    """Test the shared queue hands each record to its own logger's handlers."""
+
+    def test_records_keep_order_and_route(self):
+        """Test interleaved records come out in order, each only to its route."""
+        log_queue = queue.SimpleQueue()
+        seen = []
+        router = _RouteHandler()
+        router.routes = {
+            'app': (_CollectingHandler('app', seen),),
+            'api': (_CollectingHandler('api', seen, level=logging.INFO),),
+        }
+        app_handler = _RoutedQueueHandler(log_queue, route='app')
+        api_handler = _RoutedQueueHandler(log_queue, route='api')
+
+        for i, (handler, level) in enumerate([
+            (app_handler, logging.INFO), (api_handler, logging.INFO),
+            (api_handler, logging.DEBUG), (app_handler, logging.INFO),
+        ]):
+            handler.handle(logging.makeLogRecord({'msg': f'line {i}', 'levelno': level}))
+        listener = QueueListener(log_queue, router)
+        listener.start()
+        listener.stop()
+
+        self.assertEqual(seen, [('app', 'line 0'), ('api', 'line 1'), ('app', 'line 3')])
+
+
+class TestChineseFormatter(unittest.TestCase):
+    """Test the Chinese log formatter."""
+
+    def test_cached_time_follows_the_clock(self):
+        """Test the cached timestamp matches strftime within and across seconds."""
+        datefmt = '%Y-%m-%d %H:%M:%S'
+        formatter = ChineseFormatter('%(asctime)s', datefmt=datefmt)
+        plain = logging.Formatter('%(asctime)s', datefmt=datefmt)
+        record = logging.makeLogRecord({'msg': 'hello', 'created': 1700000000.25})
+
+        for created in (1700000000.25, 1700000000.75, 1700000001.0, 1700000000.5):
+            with self.subTest(created=created):
+                record.created = created
+                self.assertEqual(formatter.formatTime(record, datefmt), plain.formatTime(record, datefmt))
+
+
+class TestTaskLogger(unittest.TestCase):
+    """Test task progress logging."""
+
+    def test_progress_message(self):
+        """Test the progress line is rendered from deferred arguments."""
+        task_logger = TaskLogger('离线下载', 'task-1')
+
+        with self.assertLogs(task_logger.logger, logging.INFO) as logs:
+            task_logger.progress(5, 10, 'movie.mkv')
+
+        self.assertEqual(logs.records[0].getMessage(),
+                         '[离线下载] 进度: ██████████░░░░░░░░░░ 50% (5/10) - movie.mkv')
+
+    def test_progress_skipped_when_disabled(self):
+        """Test nothing is logged when INFO is disabled for the task logger."""
+        task_logger = TaskLogger('离线下载', 'task-1')
+
+        with patch.object(task_logger.logger, 'isEnabledFor', return_value=False), \
+                patch.object(task_logger.logger, 'info') as mock_info:
+            task_logger.progress(5, 10)
+
+        mock_info.assert_not_called()
+
+
+class TestLogTask(unittest.TestCase):
+    """Test the task logging decorator."""
+
+    def test_result_data_not_rendered_when_info_disabled(self):
+        """Test the result payload is not stringified when INFO is off."""
+        payload = MagicMock()
+
+        @log_task('离线下载')
+        def create_task():
+            return {'success': True, 'data': payload}
+
+        task_logger = logging.getLogger('tasks')
+        with patch.object(task_logger, 'isEnabledFor', return_value=False):
+            result = create_task()
+
+        self.assertIs(result['data'], payload)
+        payload.__str__.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,60 +1,15 @@
 import unittest
-import json
-import tempfile
-import os
-import sys
+import uuid
 from unittest.mock import Mock, patch, MagicMock
-from werkzeug.security import generate_password_hash
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-
-from main import create_app
-from persistence.store import DataStore
+from tests.base import AppTestCase, AuthedAppTestCase
 from services.offline_tasks import OfflineTaskService
-from models.offline_task import TaskStatus
+from models.offline_task import OfflineTask, TaskStatus
 
 
-class TestOfflineTaskAPI(unittest.TestCase):
+class TestOfflineTaskAPI(AuthedAppTestCase):
     """Test offline task API endpoints."""
     
-    def setUp(self):
-        """Set up test client and temporary data file."""
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-        
-        # Set up database in memory for testing
-        os.environ['DATA_PATH'] = self.temp_file.name
-        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
-        os.environ['TESTING'] = 'true'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.client = self.app.test_client()
-        self.store = DataStore(self.temp_file.name)
-        
-        # Set up admin credentials for auth
-        self.store.update_admin_password(generate_password_hash('testpass123'))
-        
-        # Get JWT token
-        login_response = self.client.post('/api/auth/login',
-            json={'username': 'admin', 'password': 'testpass123'},
-            content_type='application/json'
-        )
-        self.token = json.loads(login_response.data)['data']['token']
-        self.headers = {'Authorization': f'Bearer {self.token}'}
-    
-    def tearDown(self):
-        """Clean up temporary file."""
-        if self.app.task_poller:
-            self.app.task_poller.stop()
-        
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
-    
     def test_create_task_success(self):
         """Test creating an offline task successfully."""
         response = self.client.post('/api/115/offline/tasks',
@@ -62,12 +17,11 @@ class TestOfflineTaskAPI(unittest.TestCase):
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 201)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertIn('data', data)
         self.assertEqual(data['data']['status'], 'pending')
@@ -81,12 +35,11 @@ class TestOfflineTaskAPI(unittest.TestCase):
             json={
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
         self.assertIn('error', data)
     
@@ -96,12 +49,11 @@ class TestOfflineTaskAPI(unittest.TestCase):
             json={
                 'sourceUrl': 'https://example.com/file.zip'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 400)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
     def test_create_task_without_auth(self):
@@ -110,8 +62,7 @@ class TestOfflineTaskAPI(unittest.TestCase):
             json={
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
-            },
-            content_type='application/json'
+            }
         )
         
         self.assertEqual(response.status_code, 401)
@@ -119,11 +70,11 @@ class TestOfflineTaskAPI(unittest.TestCase):
     def test_list_tasks_empty(self):
         """Test listing tasks when none exist."""
         response = self.client.get('/api/115/offline/tasks',
-            headers=self.headers
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertEqual(len(data['data']['tasks']), 0)
         self.assertEqual(data['data']['total'], 0)
@@ -136,18 +87,17 @@ class TestOfflineTaskAPI(unittest.TestCase):
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
-        task_id = json.loads(create_response.data)['data']['id']
+        task_id = create_response.get_json()['data']['id']
         
         # List tasks
         response = self.client.get('/api/115/offline/tasks',
-            headers=self.headers
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertEqual(len(data['data']['tasks']), 1)
         self.assertEqual(data['data']['total'], 1)
@@ -155,32 +105,38 @@ class TestOfflineTaskAPI(unittest.TestCase):
     
     def test_list_tasks_with_pagination(self):
         """Test listing tasks with pagination."""
-        # Create multiple tasks
-        for i in range(5):
-            self.client.post('/api/115/offline/tasks',
-                json={
-                    'sourceUrl': f'https://example.com/file{i}.zip',
-                    'saveCid': '123456789'
-                },
-                headers=self.headers,
-                content_type='application/json'
-            )
+        # Seed the rows directly in one transaction instead of five POSTs
+        session = self.app.offline_task_service.session_factory()
+        try:
+            session.add_all([
+                OfflineTask(
+                    id=str(uuid.uuid4()),
+                    source_url=f'https://example.com/file{i}.zip',
+                    save_cid='123456789',
+                    requested_by='test_user',
+                    requested_chat='test_chat'
+                )
+                for i in range(5)
+            ])
+            session.commit()
+        finally:
+            session.close()
         
         # List with limit
         response = self.client.get('/api/115/offline/tasks?limit=2&offset=0',
-            headers=self.headers
+            headers=self.auth_header
         )
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data['data']['tasks']), 2)
         self.assertEqual(data['data']['total'], 5)
         
         # List with offset
         response = self.client.get('/api/115/offline/tasks?limit=2&offset=2',
-            headers=self.headers
+            headers=self.auth_header
         )
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data['data']['tasks']), 2)
     
     def test_list_tasks_filter_by_status(self):
@@ -191,24 +147,23 @@ class TestOfflineTaskAPI(unittest.TestCase):
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         # Filter by pending status
         response = self.client.get('/api/115/offline/tasks?status=pending',
-            headers=self.headers
+            headers=self.auth_header
         )
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data['data']['tasks']), 1)
         
         # Filter by downloading status (should be empty)
         response = self.client.get('/api/115/offline/tasks?status=downloading',
-            headers=self.headers
+            headers=self.auth_header
         )
         
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertEqual(len(data['data']['tasks']), 0)
     
     def test_get_task(self):
@@ -219,29 +174,28 @@ class TestOfflineTaskAPI(unittest.TestCase):
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
-        task_id = json.loads(create_response.data)['data']['id']
+        task_id = create_response.get_json()['data']['id']
         
         # Get the task
         response = self.client.get(f'/api/115/offline/tasks/{task_id}',
-            headers=self.headers
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertEqual(data['data']['id'], task_id)
     
     def test_get_nonexistent_task(self):
         """Test getting a nonexistent task."""
         response = self.client.get('/api/115/offline/tasks/nonexistent',
-            headers=self.headers
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 404)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertFalse(data['success'])
     
     def test_cancel_task(self):
@@ -252,18 +206,17 @@ class TestOfflineTaskAPI(unittest.TestCase):
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
-        task_id = json.loads(create_response.data)['data']['id']
+        task_id = create_response.get_json()['data']['id']
         
         # Cancel the task
         response = self.client.patch(f'/api/115/offline/tasks/{task_id}',
-            headers=self.headers
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertEqual(data['data']['status'], 'cancelled')
     
@@ -275,23 +228,22 @@ class TestOfflineTaskAPI(unittest.TestCase):
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
-        task_id = json.loads(create_response.data)['data']['id']
+        task_id = create_response.get_json()['data']['id']
         
         # Delete the task
         response = self.client.delete(f'/api/115/offline/tasks/{task_id}',
-            headers=self.headers
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         
         # Verify it's deleted
         response = self.client.get(f'/api/115/offline/tasks/{task_id}',
-            headers=self.headers
+            headers=self.auth_header
         )
         self.assertEqual(response.status_code, 404)
     
@@ -303,10 +255,9 @@ class TestOfflineTaskAPI(unittest.TestCase):
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
-        task_id = json.loads(create_response.data)['data']['id']
+        task_id = create_response.get_json()['data']['id']
         
         # Manually set task to failed status via service
         task = self.app.offline_task_service.get_task(task_id)
@@ -318,11 +269,11 @@ class TestOfflineTaskAPI(unittest.TestCase):
         
         # Retry the task
         response = self.client.post(f'/api/115/offline/tasks/{task_id}/retry',
-            headers=self.headers
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
         self.assertEqual(data['data']['status'], 'pending')
         self.assertEqual(data['data']['progress'], 0)
@@ -335,48 +286,27 @@ class TestOfflineTaskAPI(unittest.TestCase):
                 'sourceUrl': 'https://example.com/file.zip',
                 'saveCid': '123456789'
             },
-            headers=self.headers,
-            content_type='application/json'
+            headers=self.auth_header
         )
         
         # List with refresh (should sync before responding)
         response = self.client.get('/api/115/offline/tasks?refresh=true',
-            headers=self.headers
+            headers=self.auth_header
         )
         
         self.assertEqual(response.status_code, 200)
-        data = json.loads(response.data)
+        data = response.get_json()
         self.assertTrue(data['success'])
 
 
-class TestOfflineTaskService(unittest.TestCase):
+class TestOfflineTaskService(AppTestCase):
     """Test offline task service."""
     
     def setUp(self):
-        """Set up test environment."""
-        self.temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
-        self.temp_file.close()
-        
-        os.environ['DATA_PATH'] = self.temp_file.name
-        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
-        
-        self.app = create_app({
-            'TESTING': True,
-            'JWT_SECRET_KEY': 'test-secret',
-            'SECRET_KEY': 'test-secret'
-        })
-        
-        self.store = DataStore(self.temp_file.name)
+        """Reset the shared app and grab its offline task service."""
+        super().setUp()
         self.service = self.app.offline_task_service
     
-    def tearDown(self):
-        """Clean up."""
-        if self.app.task_poller:
-            self.app.task_poller.stop()
-        
-        if os.path.exists(self.temp_file.name):
-            os.unlink(self.temp_file.name)
-    
     def test_create_task(self):
         """Test creating a task via service."""
         result = self.service.create_task(
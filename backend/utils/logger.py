@@ -1,16 +1,25 @@
 # utils/logger.py
 # 应用日志系统 - 支持文件持久化、敏感数据脱敏、中文格式化
+#
+# LOG_MASK_PROFILE 控制脱敏范围:
+#   full (默认)   - 密钥/令牌/Cookie，以及邮箱和手机号
+#   secrets_only  - 只脱敏密钥/令牌/Cookie；跳过邮箱和手机号两条全文扫描的正则，
+#                   代价是日志中会保留明文邮箱和手机号
 
+import atexit
 import os
+import queue
 import re
+import threading
+import time
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 from typing import Optional
 
 
-# === 敏感数据脱敏模式 ===
-SENSITIVE_PATTERNS = [
+# === 敏感数据脱敏模式 (导入时编译一次) ===
+SENSITIVE_PATTERNS = [(re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in [
     # API Keys (长字符串)
     (r'(["\']?(?:api[_-]?key|apikey|token|secret|password|pwd|cookie)["\']?\s*[:=]\s*["\']?)([a-zA-Z0-9_\-]{8,})', r'\1***已脱敏***'),
     # JWT Token
@@ -21,14 +30,44 @@ SENSITIVE_PATTERNS = [
     (r'([a-zA-Z0-9._%+-]+)@([a-zA-Z0-9.-]+\.[a-zA-Z]{2,})', r'***@\2'),
     # 手机号
     (r'(\d{3})\d{4}(\d{4})', r'\1****\2'),
-]
+]]
+
+_MASK_PROFILE = os.environ.get('LOG_MASK_PROFILE', 'full')
+if _MASK_PROFILE == 'secrets_only':
+    # 前三条: API Key、Bearer 令牌、Cookie
+    SENSITIVE_PATTERNS = SENSITIVE_PATTERNS[:3]
+
+
+# 各条规则都离不开的标记 (casefold 后比较)；消息里一个都没有时整段跳过正则
+_SENSITIVE_MARKERS = ('key', 'token', 'secret', 'password', 'pwd', 'cookie', 'bearer', 'id=', 'acw_tc=')
+_PHONE_MARKER = re.compile(r'\d{11}')
+# 邮箱、手机号两条正则要扫全文，各配一个廉价预检，消息里有其他标记时也能跳过
+_PATTERN_GUARDS = {}
+if _MASK_PROFILE != 'secrets_only':
+    _SENSITIVE_MARKERS += ('@',)
+    _PATTERN_GUARDS = {
+        SENSITIVE_PATTERNS[3][0]: lambda message: '@' in message,
+        SENSITIVE_PATTERNS[4][0]: _PHONE_MARKER.search,
+    }
+
+
+def _has_sensitive_marker(message: str) -> bool:
+    """廉价预检：消息是否可能包含需要脱敏的内容"""
+    folded = message.casefold()
+    if any(marker in folded for marker in _SENSITIVE_MARKERS):
+        return True
+    return _MASK_PROFILE != 'secrets_only' and _PHONE_MARKER.search(message) is not None
 
 
 def mask_sensitive_data(message: str) -> str:
     """对日志消息中的敏感数据进行脱敏处理"""
+    if not _has_sensitive_marker(message):
+        return message
     result = message
     for pattern, replacement in SENSITIVE_PATTERNS:
-        result = re.sub(pattern, replacement, result, flags=re.IGNORECASE)
+        guard = _PATTERN_GUARDS.get(pattern)
+        if guard is None or guard(result):
+            result = pattern.sub(replacement, result)
     return result
 
 
@@ -41,40 +80,99 @@ LEVEL_NAMES_CN = {
     'CRITICAL': '严重',
 }
 
+# === 中文模块名映射 ===
+MODULE_NAMES_CN = {
+    'app': '应用',
+    'api': '接口',
+    'tasks': '任务',
+    'cloud': '云盘',
+    'auth': '认证',
+    'config': '配置',
+    'emby': 'Emby',
+    'strm': 'STRM',
+    'bot': '机器人',
+}
+
 
 class ChineseFormatter(logging.Formatter):
-    """中文格式化器，支持敏感数据脱敏"""
+    """中文格式化器 (脱敏在入队时由 MaskingQueueHandler 完成)"""
     
-    def __init__(self, fmt=None, datefmt=None, mask_sensitive=True):
+    def __init__(self, fmt=None, datefmt=None):
         super().__init__(fmt, datefmt)
-        self.mask_sensitive = mask_sensitive
+        # (整秒, 时间字符串)；同一秒内的记录复用，整体替换以免多线程读到半更新的值
+        self._last_asctime = (None, None)
+    
+    def formatTime(self, record, datefmt=None):
+        # datefmt 只精确到秒，同一秒内 strftime 结果相同；未设置时基类会追加毫秒，不能缓存
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        second = int(record.created)
+        cached_second, asctime = self._last_asctime
+        if cached_second != second:
+            asctime = time.strftime(datefmt, self.converter(record.created))
+            self._last_asctime = (second, asctime)
+        return asctime
     
     def format(self, record):
         # 中文日志级别
         record.levelname_cn = LEVEL_NAMES_CN.get(record.levelname, record.levelname)
         
         # 模块名中文化
-        module_names = {
-            'app': '应用',
-            'api': '接口',
-            'tasks': '任务',
-            'cloud': '云盘',
-            'auth': '认证',
-            'config': '配置',
-            'emby': 'Emby',
-            'strm': 'STRM',
-            'bot': '机器人',
-        }
-        record.name_cn = module_names.get(record.name, record.name)
-        
-        # 格式化消息
-        formatted = super().format(record)
+        record.name_cn = MODULE_NAMES_CN.get(record.name, record.name)
         
-        # 敏感数据脱敏
-        if self.mask_sensitive:
-            formatted = mask_sensitive_data(formatted)
-        
-        return formatted
+        return super().format(record)
+
+
+class _RoutedQueueHandler(QueueHandler):
+    """入队时记下所属日志器，监听线程据此只交给该日志器自己的处理器"""
+    
+    def __init__(self, queue, route=None):
+        super().__init__(queue)
+        self.route = route
+    
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.log_route = self.route
+        return record
+
+
+class MaskingQueueHandler(_RoutedQueueHandler):
+    """入队时对整条消息 (含异常堆栈) 脱敏一次，控制台和文件处理器共用结果"""
+    
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.msg = record.message = mask_sensitive_data(record.msg)
+        return record
+
+
+class _RouteHandler(logging.Handler):
+    """监听线程上的分发器：按 log_route 把记录交给对应日志器的控制台/文件处理器"""
+    
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+    
+    def emit(self, record):
+        for handler in self.routes.get(getattr(record, 'log_route', None), ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+# 所有日志器共用一个队列和一个后台监听线程，写到同一控制台/文件的行保持调用顺序
+_LOG_QUEUE = queue.SimpleQueue()
+_ROUTER = _RouteHandler()
+_LISTENER = QueueListener(_LOG_QUEUE, _ROUTER)
+_listener_lock = threading.Lock()
+_listener_started = False
+
+
+def _start_listener():
+    """第一个日志器配置时启动监听线程"""
+    global _listener_started
+    with _listener_lock:
+        if not _listener_started:
+            _LISTENER.start()
+            _listener_started = True
 
 
 def get_log_dir():
@@ -124,17 +222,18 @@ def setup_logger(
     
     # 中文格式化 - 控制台
     console_fmt = '%(asctime)s │ %(levelname_cn)-4s │ %(name_cn)-6s │ %(message)s'
-    console_formatter = ChineseFormatter(console_fmt, datefmt='%H:%M:%S', mask_sensitive=mask_sensitive)
+    console_formatter = ChineseFormatter(console_fmt, datefmt='%H:%M:%S')
     
     # 中文格式化 - 文件
     file_fmt = '%(asctime)s │ %(levelname_cn)-4s │ %(name_cn)-6s │ %(message)s'
-    file_formatter = ChineseFormatter(file_fmt, datefmt='%Y-%m-%d %H:%M:%S', mask_sensitive=mask_sensitive)
+    file_formatter = ChineseFormatter(file_fmt, datefmt='%Y-%m-%d %H:%M:%S')
     
     # 控制台处理器
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
+    file_error = None
     
     # 文件处理器
     try:
@@ -149,13 +248,35 @@ def setup_logger(
         )
         file_handler.setLevel(level)
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     except Exception as e:
-        logger.warning(f'创建文件日志处理器失败: {e}')
+        file_error = e
+    
+    # QueueHandler.prepare 在调用线程上拼好消息和异常堆栈 (开启脱敏时也在这里脱敏一次)，
+    # 后台监听线程只套用日志模板、写盘和轮转；记录按日志器名分发到各自的处理器
+    _ROUTER.routes[name] = tuple(handlers)
+    queue_handler_class = MaskingQueueHandler if mask_sensitive else _RoutedQueueHandler
+    logger.addHandler(queue_handler_class(_LOG_QUEUE, route=name))
+    _start_listener()
+    
+    if file_error:
+        logger.warning(f'创建文件日志处理器失败: {file_error}')
     
     return logger
 
 
+def _stop_listener():
+    """进程退出前刷出队列中剩余的日志"""
+    global _listener_started
+    with _listener_lock:
+        if _listener_started:
+            _LISTENER.stop()
+            _listener_started = False
+
+
+atexit.register(_stop_listener)
+
+
 # === 预配置日志器 ===
 
 def get_app_logger():
@@ -180,6 +301,10 @@ def get_cloud_logger():
 
 # === 任务日志辅助函数 ===
 
+# 进度条共 21 种形态 (每格 5%)，预先生成
+_PROGRESS_BARS = tuple('█' * n + '░' * (20 - n) for n in range(21))
+
+
 class TaskLogger:
     """任务执行日志器 - 记录任务启动、进度和结果"""
     
@@ -191,47 +316,53 @@ class TaskLogger:
     
     def start(self, description: str = None):
         """记录任务启动"""
-        self.start_time = datetime.now()
-        msg = f'[{self.task_type}] 任务开始 (ID: {self.task_id})'
+        self.start_time = time.perf_counter()
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if description:
-            msg += f' - {description}'
-        self.logger.info(msg)
+            self.logger.info('[%s] 任务开始 (ID: %s) - %s', self.task_type, self.task_id, description)
+        else:
+            self.logger.info('[%s] 任务开始 (ID: %s)', self.task_type, self.task_id)
     
     def progress(self, current: int, total: int, message: str = None):
         """记录任务进度"""
-        percent = int(current / total * 100) if total > 0 else 0
-        bar = '█' * (percent // 5) + '░' * (20 - percent // 5)
-        msg = f'[{self.task_type}] 进度: {bar} {percent}% ({current}/{total})'
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+        percent = int(current * 100 // total) if total > 0 else 0
+        bar = _PROGRESS_BARS[min(max(percent // 5, 0), 20)]
         if message:
-            msg += f' - {message}'
-        self.logger.info(msg)
+            self.logger.info('[%s] 进度: %s %d%% (%d/%d) - %s', self.task_type, bar, percent, current, total, message)
+        else:
+            self.logger.info('[%s] 进度: %s %d%% (%d/%d)', self.task_type, bar, percent, current, total)
+    
+    def _elapsed(self) -> str:
+        """格式化自 start() 起的耗时"""
+        if self.start_time is None:
+            return ''
+        return f' (耗时: {time.perf_counter() - self.start_time:.2f}秒)'
     
     def success(self, result: str = None):
         """记录任务成功"""
-        elapsed = ''
-        if self.start_time:
-            delta = datetime.now() - self.start_time
-            elapsed = f' (耗时: {delta.total_seconds():.2f}秒)'
-        msg = f'[{self.task_type}] ✅ 任务完成{elapsed}'
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         if result:
-            msg += f' - {result}'
-        self.logger.info(msg)
+            self.logger.info('[%s] ✅ 任务完成%s - %s', self.task_type, self._elapsed(), result)
+        else:
+            self.logger.info('[%s] ✅ 任务完成%s', self.task_type, self._elapsed())
     
     def failure(self, error: str):
         """记录任务失败"""
-        elapsed = ''
-        if self.start_time:
-            delta = datetime.now() - self.start_time
-            elapsed = f' (耗时: {delta.total_seconds():.2f}秒)'
-        self.logger.error(f'[{self.task_type}] ❌ 任务失败{elapsed} - {error}')
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
+        self.logger.error('[%s] ❌ 任务失败%s - %s', self.task_type, self._elapsed(), error)
     
     def warning(self, message: str):
         """记录任务警告"""
-        self.logger.warning(f'[{self.task_type}] ⚠️ {message}')
+        self.logger.warning('[%s] ⚠️ %s', self.task_type, message)
     
     def info(self, message: str):
         """记录任务信息"""
-        self.logger.info(f'[{self.task_type}] {message}')
+        self.logger.info('[%s] %s', self.task_type, message)
 
 
 # === 操作日志辅助函数 ===
@@ -248,37 +379,49 @@ def log_operation(module: str, action: str, target: str = None, result: str = No
         error: 错误信息
     """
     logger = get_app_logger()
+    level = logging.ERROR if error else logging.INFO
+    if not logger.isEnabledFor(level):
+        return
     
-    msg = f'【{module}】{action}'
+    msg = '【%s】%s'
+    args = [module, action]
     if target:
-        msg += f' -> {target}'
+        msg += ' -> %s'
+        args.append(target)
     
     if error:
-        logger.error(f'{msg} ❌ 失败: {error}')
+        logger.error(msg + ' ❌ 失败: %s', *args, error)
     elif result:
-        logger.info(f'{msg} ✅ {result}')
+        logger.info(msg + ' ✅ %s', *args, result)
     else:
-        logger.info(msg)
+        logger.info(msg, *args)
 
 
 def log_api_request(method: str, path: str, status: int, duration_ms: int = None, user: str = None):
     """记录 API 请求日志"""
     logger = get_api_logger()
     
+    if status >= 500:
+        level = logging.ERROR
+    elif status >= 400:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    if not logger.isEnabledFor(level):
+        return
+    
     status_emoji = '✅' if 200 <= status < 300 else '⚠️' if 300 <= status < 500 else '❌'
     
-    msg = f'{method} {path} {status_emoji} {status}'
+    msg = '%s %s %s %s'
+    args = [method, path, status_emoji, status]
     if duration_ms:
-        msg += f' ({duration_ms}ms)'
+        msg += ' (%sms)'
+        args.append(duration_ms)
     if user:
-        msg += f' 用户: {user}'
+        msg += ' 用户: %s'
+        args.append(user)
     
-    if status >= 500:
-        logger.error(msg)
-    elif status >= 400:
-        logger.warning(msg)
-    else:
-        logger.info(msg)
+    logger.log(level, msg, *args)
 
 
 # 默认日志器实例
@@ -311,7 +454,8 @@ def log_task(task_type: str, description: str = None):
                 if isinstance(result, dict):
                     if result.get('success') == False:
                         task_logger.failure(result.get('error', '未知错误'))
-                    else:
+                    elif task_logger.logger.isEnabledFor(logging.INFO):
+                        # data 可能是很大的列表，只在确实输出时才转成字符串
                         task_logger.success(str(result.get('data', ''))[:100])
                 else:
                     task_logger.success()
@@ -1,17 +1,31 @@
 """测试 115 原生客户端"""
 import sys
+from concurrent.futures import ThreadPoolExecutor
 sys.path.insert(0, "backend")
 
 from services.p115_open_client import P115CookieClient, P115OpenClient
 
+
+def probe_cookie():
+    return P115CookieClient().generate_qrcode("tv")
+
+
+def probe_open():
+    return P115OpenClient(app_id="100197531").generate_qrcode()
+
+
+# 两个探测互不依赖，并发发出，总耗时取较慢的一个而不是两者之和
+with ThreadPoolExecutor(max_workers=2) as pool:
+    cookie_future = pool.submit(probe_cookie)
+    open_future = pool.submit(probe_open)
+
 print("=" * 50)
 print("测试 P115CookieClient")
 print("=" * 50)
 
 try:
-    client = P115CookieClient()
-    result = client.generate_qrcode("tv")
-    
+    result = cookie_future.result()
+
     if result.get("success"):
         uid = result.get("uid", "")
         print(f"✓ 二维码生成成功!")
@@ -30,9 +44,8 @@ print("测试 P115OpenClient")
 print("=" * 50)
 
 try:
-    open_client = P115OpenClient(app_id="100197531")
-    result = open_client.generate_qrcode()
-    
+    result = open_future.result()
+
     if result.get("success"):
         uid = result.get("uid", "")
         print(f"✓ Open 二维码生成成功!")
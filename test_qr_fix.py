@@ -11,12 +11,12 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
 from p115_bridge import StandardClientHolder
 
-def test_qr_generation():
+def test_qr_generation(verbose=True):
     print("=" * 60)
     print("测试 115 二维码生成")
     print("=" * 60)
     
-    holder = StandardClientHolder(secret_store=None)
+    holder = StandardClientHolder()
     result = holder.start_qrcode(app="tv")
     
     print(f"\n返回结果:")
@@ -28,16 +28,19 @@ def test_qr_generation():
     if qrcode:
         print(f"\n二维码数据:")
         print(f"  长度: {len(qrcode)}")
-        print(f"  前缀: {qrcode[:50]}...")
+        if verbose:
+            print(f"  前缀: {qrcode[:50]}...")
         
         # 检查是否有 data URL 前缀
         if qrcode.startswith('data:image'):
             print(f"  ✅ 正确! 有 data URL 前缀")
         else:
             print(f"  ❌ 错误! 没有 data URL 前缀")
-            print(f"  前 100 字符: {qrcode[:100]}")
+            if verbose:
+                print(f"  前 100 字符: {qrcode[:100]}")
     else:
         print(f"\n❌ 没有返回二维码数据")
 
 if __name__ == "__main__":
-    test_qr_generation()
+    # --quiet: CI 冒烟循环里只看结论，不打印二维码数据片段
+    test_qr_generation(verbose="--quiet" not in sys.argv)
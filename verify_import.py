@@ -1,10 +1,25 @@
+import time
 
-try:
-    from backend.cloud123 import Cloud123Client
+
+def main():
+    t0 = time.perf_counter()
+    try:
+        from backend.cloud123 import Cloud123Client
+    except ImportError as e:
+        print(f"FAILED: {e}")
+        return
+    t1 = time.perf_counter()
     print("SUCCESS: Cloud123Client imported")
-    client = Cloud123Client()
+
+    try:
+        Cloud123Client()
+    except Exception as e:
+        print(f"FAILED: {e}")
+        return
+    t2 = time.perf_counter()
     print("SUCCESS: Cloud123Client instantiated")
-except ImportError as e:
-    print(f"FAILED: {e}")
-except Exception as e:
-    print(f"FAILED: {e}")
+    print(f"import {(t1 - t0) * 1e3:.1f}ms init {(t2 - t1) * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()